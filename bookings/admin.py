@@ -1,16 +1,195 @@
-from django.contrib import admin
-from .models import Conference, Booking
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import Conference, Booking, Location, TeamMembership, Job, ArchivedBooking, BookingRollup
+from .signals import touch_conferences
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that reads the planner's row estimate instead of running
+    COUNT(*) over an unfiltered huge table (PostgreSQL only; other backends
+    and filtered changelists fall back to an exact count)
+    """
+    # Below this the exact count is cheap enough and nicer to look at
+    estimate_threshold = 100_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] > self.estimate_threshold:
+                return row[0]
+        return super().count
+
+
+class AutocompleteFilter(admin.SimpleListFilter):
+    """
+    Type-ahead filter on a foreign key. Suggestions come from the admin
+    autocomplete endpoint, so the sidebar never lists every related row.
+    Accepts a primary key (picked from the suggestions) or free text.
+    """
+    template = 'admin/bookings/autocomplete_filter.html'
+    field_name = None
+    search_field = None
+
+    def lookups(self, request, model_admin):
+        # A single placeholder keeps the filter visible; choices() renders the input
+        return [('', '')]
+
+    def queryset(self, request, queryset):
+        value = (self.value() or '').strip()
+        if not value:
+            return queryset
+        if value.isdigit():
+            return queryset.filter(**{f'{self.field_name}_id': value})
+        return queryset.filter(**{f'{self.field_name}__{self.search_field}__icontains': value})
+
+    def choices(self, changelist):
+        opts = changelist.model._meta
+        yield {
+            'value': self.value() or '',
+            'parameter_name': self.parameter_name,
+            'other_params': [
+                (key, value) for key, value in changelist.params.items()
+                if key != self.parameter_name
+            ],
+            'autocomplete_url': reverse('admin:autocomplete'),
+            'app_label': opts.app_label,
+            'model_name': opts.model_name,
+            'field_name': self.field_name,
+        }
+
+
+class ConferenceFilter(AutocompleteFilter):
+    title = 'conference'
+    parameter_name = 'conference'
+    field_name = 'conference'
+    search_field = 'title'
+
+
+class UserFilter(AutocompleteFilter):
+    title = 'user'
+    parameter_name = 'user'
+    field_name = 'user'
+    search_field = 'username'
+
+
+@admin.register(Location)
+class LocationAdmin(admin.ModelAdmin):
+    list_display = ['name', 'updated_at']
+    search_fields = ['name']
+
 
 @admin.register(Conference)
 class ConferenceAdmin(admin.ModelAdmin):
     list_display = ['title', 'location', 'capacity', ]
     list_filter = ['location']
-    search_fields = ['title', 'location']
-    # ordering = ['-date']
+    list_select_related = ['location']
+    search_fields = ['title', 'location__name']
+    autocomplete_fields = ['location', 'created_by']
+    ordering = ['-created_at']
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ['user', 'conference', 'booking_date', 'status']
-    list_filter = ['status', 'booking_date', 'conference']
+    list_filter = ['status', ConferenceFilter, UserFilter]
+    list_select_related = ['user', 'conference']
     search_fields = ['user__username', 'conference__title']
-    # ordering = ['-booking_date']
\ No newline at end of file
+    autocomplete_fields = ['user', 'conference', 'approved_by']
+    date_hierarchy = 'booking_date'
+    ordering = ['-booking_date']
+    actions = ['approve_selected', 'reject_selected', 'cancel_selected']
+
+    # Large-table behaviour: no second COUNT(*) for the unfiltered total, no
+    # facet counts per filter option, estimated row count for pagination
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+    def _bulk_set_status(self, request, queryset, label, **fields):
+        """Apply a status change as one UPDATE, then invalidate the conferences"""
+        # Read the conferences first: the queryset may filter on the status
+        # being changed, and would match nothing after the UPDATE
+        conference_ids = list(queryset.values_list('conference_id', flat=True).distinct())
+        updated = queryset.exclude(status=fields['status']).update(**fields)
+        touch_conferences(conference_ids)
+        self.message_user(
+            request,
+            f'{updated} booking(s) marked as {label}. No notification emails were sent.',
+            messages.SUCCESS,
+        )
+
+    @admin.action(description='Approve selected bookings')
+    def approve_selected(self, request, queryset):
+        self._bulk_set_status(
+            request, queryset, 'approved',
+            status='approved', approved_by=request.user, approved_date=timezone.now(),
+        )
+
+    @admin.action(description='Reject selected bookings')
+    def reject_selected(self, request, queryset):
+        self._bulk_set_status(request, queryset, 'rejected', status='rejected')
+
+    @admin.action(description='Cancel selected bookings')
+    def cancel_selected(self, request, queryset):
+        self._bulk_set_status(request, queryset, 'cancelled', status='cancelled')
+
+@admin.register(TeamMembership)
+class TeamMembershipAdmin(admin.ModelAdmin):
+    list_display = ['manager', 'member']
+    list_select_related = ['manager', 'member']
+    search_fields = ['manager__username', 'member__username']
+    autocomplete_fields = ['manager', 'member']
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'progress', 'attempts', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    list_select_related = ['created_by']
+    readonly_fields = ['started_at', 'finished_at', 'created_at']
+    ordering = ['-created_at']
+
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(admin.ModelAdmin):
+    list_display = ['user', 'conference_title', 'booking_date', 'status', 'archived_at']
+    list_filter = ['status']
+    list_select_related = ['user']
+    search_fields = ['user__username', 'conference_title']
+    date_hierarchy = 'booking_date'
+    ordering = ['-booking_date']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+    # Written only by the archive_bookings command
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(BookingRollup)
+class BookingRollupAdmin(admin.ModelAdmin):
+    list_display = ['conference_title', 'location_name', 'starts_at', 'capacity', 'total', 'approved', 'cancelled']
+    search_fields = ['conference_title', 'location_name']
+    ordering = ['-starts_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
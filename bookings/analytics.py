@@ -0,0 +1,225 @@
+# bookings/analytics.py
+"""
+Capacity planning from booking history.
+
+The whole history is pulled once as flat columns and every metric is
+computed with NumPy array operations, so the cost is a single pass over
+the Booking table however many conferences there are.
+"""
+import math
+from array import array
+from dataclasses import dataclass
+from typing import Optional
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.models import Case, IntegerField, Value, When
+
+from .models import ArchivedBooking, Booking, Conference, Location
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+STATUS_CODES = {'pending': 0, 'approved': 1, 'rejected': 2, 'cancelled': 3}
+ACTIVE_CODES = (STATUS_CODES['pending'], STATUS_CODES['approved'])
+
+# Sold-out conferences turned people away, so their demand is a lower bound
+SELLOUT_HEADROOM = 1.2
+DEMAND_PERCENTILE = 90
+FETCH_CHUNK_SIZE = 20000
+
+
+@dataclass
+class LocationForecast:
+    location_id: int
+    location_name: str
+    conferences: int
+    median_demand: float
+    mean_fill_rate: float
+    cancellation_rate: float
+    sellout_rate: float
+    median_hours_to_sellout: Optional[float]
+    recommended_capacity: Optional[int]
+
+
+def _require_numpy():
+    if np is None:
+        raise ImproperlyConfigured('Capacity forecasting requires numpy (pip install numpy).')
+
+
+def _fetch_raw(queryset):
+    """Yield lists of raw DB rows for a values_list() queryset"""
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(FETCH_CHUNK_SIZE)
+            if not rows:
+                break
+            yield rows
+
+
+def _to_epoch_seconds(values):
+    """
+    Raw datetime column as epoch seconds. Depending on the backend the driver
+    hands back ISO strings, naive datetimes stored in UTC or aware datetimes.
+    NumPy parses the first two itself; aware values still take a Python-level
+    pass, as datetime64 has no time zones.
+    """
+    if not values:
+        return np.empty(0)
+    if isinstance(values[0], str) or values[0].tzinfo is None:
+        return np.array(values, dtype='datetime64[us]').astype(np.int64) / 1e6
+    return np.fromiter((value.timestamp() for value in values), dtype=np.float64, count=len(values))
+
+
+def load_history():
+    """
+    Conference and booking columns as NumPy arrays.
+
+    Bookings are streamed in chunks into typed buffers, so no model
+    instances are created and memory stays at a few bytes per row.
+    """
+    _require_numpy()
+    conference_rows = Conference.objects.order_by('pk').values_list(
+        'pk', 'location_id', 'capacity', 'created_at',
+    )
+    conf_ids, conf_locations, conf_capacity, conf_created = array('q'), array('q'), array('q'), array('d')
+    for pk, location_id, capacity, created_at in conference_rows.iterator(chunk_size=FETCH_CHUNK_SIZE):
+        conf_ids.append(pk)
+        conf_locations.append(location_id or -1)
+        conf_capacity.append(capacity)
+        conf_created.append(created_at.timestamp())
+
+    # Status is mapped to a small integer in SQL, and the query runs on a raw
+    # cursor: Django's per-row datetime converters would otherwise dominate
+    status_code = Case(
+        *[When(status=status, then=Value(code)) for status, code in STATUS_CODES.items()],
+        default=Value(-1), output_field=IntegerField(),
+    )
+    booking_rows = Booking.objects.order_by().annotate(status_code=status_code).values_list(
+        'conference_id', 'status_code', 'booking_date',
+    )
+    # Archived bookings are history too, as long as their conference still exists
+    archived_rows = ArchivedBooking.objects.order_by().filter(
+        conference_id__in=Conference.objects.values('pk'),
+    ).annotate(status_code=status_code).values_list('conference_id', 'status_code', 'booking_date')
+
+    booking_conf, booking_status, booking_ts = array('q'), array('b'), []
+    for rows in (booking_rows, archived_rows):
+        for chunk in _fetch_raw(rows):
+            conference_ids, statuses, dates = zip(*chunk)
+            booking_conf.extend(conference_ids)
+            booking_status.extend(statuses)
+            booking_ts.append(_to_epoch_seconds(dates))
+
+    return {
+        'conference_id': np.frombuffer(conf_ids, dtype=np.int64),
+        'conference_location': np.frombuffer(conf_locations, dtype=np.int64),
+        'conference_capacity': np.frombuffer(conf_capacity, dtype=np.int64),
+        'conference_created': np.frombuffer(conf_created, dtype=np.float64),
+        'booking_conference': np.frombuffer(booking_conf, dtype=np.int64),
+        'booking_status': np.frombuffer(booking_status, dtype=np.int8),
+        'booking_time': np.concatenate(booking_ts) if booking_ts else np.empty(0),
+    }
+
+
+def conference_metrics(history):
+    """
+    Per-conference arrays aligned with history['conference_id']: demand
+    (all applications), fill rate, cancellation rate and seconds from
+    publication to the booking that filled the last seat (NaN if never).
+    """
+    _require_numpy()
+    conf_ids = history['conference_id']
+    capacity = history['conference_capacity']
+    n = len(conf_ids)
+
+    # Conference ids are sorted, so searchsorted maps bookings to row indexes.
+    # Conferences and bookings are read in separate queries, so drop bookings
+    # for conferences created after the conference snapshot was taken.
+    booking_conference = history['booking_conference']
+    conf_index = np.searchsorted(conf_ids, booking_conference)
+    known = conf_ids[np.minimum(conf_index, n - 1)] == booking_conference if n else conf_index < 0
+    conf_index = conf_index[known]
+    status = history['booking_status'][known]
+    times = history['booking_time'][known]
+
+    is_active = np.isin(status, ACTIVE_CODES)
+    demand = np.bincount(conf_index, minlength=n)
+    active = np.bincount(conf_index, weights=is_active, minlength=n)
+    cancelled = np.bincount(conf_index, weights=status == STATUS_CODES['cancelled'], minlength=n)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fill_rate = np.where(capacity > 0, active / capacity, np.nan)
+        cancellation_rate = np.where(demand > 0, cancelled / demand, np.nan)
+
+    # Rank the bookings still holding a seat within their conference by time;
+    # the one ranked capacity-1 sold the conference out. Rejected and
+    # cancelled bookings hold no seat, so they are left out.
+    active_index, active_times = conf_index[is_active], times[is_active]
+    order = np.lexsort((active_times, active_index))
+    sorted_index = active_index[order]
+    group_start = np.concatenate(([0], np.cumsum(active)[:-1])).astype(np.int64)
+    rank = np.arange(len(order)) - group_start[sorted_index]
+    sellout = rank == capacity[sorted_index] - 1
+
+    time_to_sellout = np.full(n, np.nan)
+    sold_index = sorted_index[sellout]
+    time_to_sellout[sold_index] = active_times[order][sellout] - history['conference_created'][sold_index]
+
+    return {
+        'demand': demand,
+        'fill_rate': fill_rate,
+        'cancellation_rate': cancellation_rate,
+        'time_to_sellout': time_to_sellout,
+    }
+
+
+def recommend_capacity(demand, cancellation_rate, sold_out):
+    """
+    Seats covering DEMAND_PERCENTILE of past conferences net of expected
+    cancellations, with headroom when most of them sold out.
+    """
+    if not len(demand):
+        return None
+    seats = np.percentile(demand, DEMAND_PERCENTILE) * (1 - np.nan_to_num(cancellation_rate))
+    if sold_out.mean() > 0.5:
+        seats *= SELLOUT_HEADROOM
+    return max(1, math.ceil(seats))
+
+
+def forecast_by_location(history=None):
+    """One LocationForecast per location that has hosted conferences"""
+    _require_numpy()
+    history = history if history is not None else load_history()
+    metrics = conference_metrics(history)
+    locations = history['conference_location']
+    names = dict(Location.objects.values_list('pk', 'name'))
+
+    forecasts = []
+    for location_id in np.unique(locations[locations >= 0]):
+        mask = locations == location_id
+        demand = metrics['demand'][mask]
+        total_demand = demand.sum()
+        cancelled = np.nansum(metrics['cancellation_rate'][mask] * demand)
+        cancellation_rate = cancelled / total_demand if total_demand else 0.0
+        sellout_times = metrics['time_to_sellout'][mask]
+        sold_out = ~np.isnan(sellout_times)
+        fill_rates = metrics['fill_rate'][mask]
+        fill_rates = fill_rates[~np.isnan(fill_rates)]
+
+        forecasts.append(LocationForecast(
+            location_id=int(location_id),
+            location_name=names.get(int(location_id), ''),
+            conferences=int(mask.sum()),
+            median_demand=float(np.median(demand)),
+            mean_fill_rate=float(fill_rates.mean()) if len(fill_rates) else 0.0,
+            cancellation_rate=float(cancellation_rate),
+            sellout_rate=float(sold_out.mean()),
+            median_hours_to_sellout=float(np.median(sellout_times[sold_out]) / 3600) if sold_out.any() else None,
+            recommended_capacity=recommend_capacity(demand, cancellation_rate, sold_out),
+        ))
+    return forecasts
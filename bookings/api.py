@@ -0,0 +1,149 @@
+# bookings/api.py
+"""
+Read API helpers: sparse fieldsets, values_list() serialization and
+keyset pagination.
+
+Every resource maps public field names to ORM lookups. Only the
+requested columns are selected and rows go straight from the cursor to
+dicts, so no model instances are built. Responses are encoded with
+orjson when it is installed, otherwise with compact stdlib json; both
+write datetimes the same way (ISO 8601, microseconds, 'Z' for UTC).
+"""
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+from .caching import annotate_seats_left
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Public name -> ORM lookup. seats_left is an annotation added on demand.
+CONFERENCE_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'description': 'description',
+    'location_id': 'location_id',
+    'location': 'location__name',
+    'capacity': 'capacity',
+    'seats_left': 'seats_left',
+    'starts_at': 'starts_at',
+    'ends_at': 'ends_at',
+    'requires_approval': 'requires_approval',
+    'allocation_mode': 'allocation_mode',
+    'applications_close_at': 'applications_close_at',
+    'updated_at': 'updated_at',
+}
+CONFERENCE_DEFAULT_FIELDS = ['id', 'title', 'location', 'starts_at', 'ends_at', 'seats_left']
+
+LOCATION_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'address': 'address',
+    'updated_at': 'updated_at',
+}
+LOCATION_DEFAULT_FIELDS = ['id', 'name']
+
+BOOKING_FIELDS = {
+    'id': 'id',
+    'status': 'status',
+    'booking_date': 'booking_date',
+    'priority': 'priority',
+    'approved_date': 'approved_date',
+    'rejection_reason': 'rejection_reason',
+    'conference_id': 'conference_id',
+    'conference': 'conference__title',
+    'location': 'conference__location__name',
+    'starts_at': 'conference__starts_at',
+    'ends_at': 'conference__ends_at',
+}
+BOOKING_DEFAULT_FIELDS = ['id', 'status', 'booking_date', 'conference_id', 'conference', 'starts_at']
+
+
+class ApiError(ValueError):
+    """A bad query parameter, reported to the client as a 400"""
+
+
+class ApiJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder writing datetimes as orjson does, not cut to milliseconds"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            text = o.isoformat()
+            return text[:-6] + 'Z' if text.endswith('+00:00') else text
+        return super().default(o)
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_UTC_Z)
+    return json.dumps(data, cls=ApiJSONEncoder, separators=(',', ':')).encode()
+
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), content_type='application/json', status=status)
+
+
+def parse_fields(request, available, default):
+    """The fields named in ?fields=a,b,c, checked against the resource"""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(default)
+    fields = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise ApiError(f'Unknown field(s): {", ".join(unknown)}. Available: {", ".join(available)}')
+    return fields
+
+
+def parse_limit(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ApiError('limit must be an integer')
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def parse_cursor(request):
+    """Cursors are the id of the last row served"""
+    after = request.GET.get('after')
+    if not after:
+        return None
+    try:
+        return int(after)
+    except ValueError:
+        raise ApiError('Invalid cursor')
+
+
+def page(request, queryset, available, default, descending=False):
+    """
+    One keyset page of ``queryset`` as {'results': [...], 'next': cursor}.
+
+    Pages are ordered by id, so each one is an index range scan whatever
+    its depth.
+    """
+    fields = parse_fields(request, available, default)
+    limit = parse_limit(request)
+    after = parse_cursor(request)
+
+    if 'seats_left' in fields:
+        queryset = annotate_seats_left(queryset)
+    if after is not None:
+        queryset = queryset.filter(id__lt=after) if descending else queryset.filter(id__gt=after)
+    queryset = queryset.order_by('-id' if descending else 'id')
+
+    # The id is always fetched (last column) to build the next cursor
+    lookups = [available[name] for name in fields] + ['id']
+    rows = list(queryset.values_list(*lookups)[:limit + 1])
+    next_cursor = str(rows[limit - 1][-1]) if len(rows) > limit else None
+    return {
+        'results': [dict(zip(fields, row)) for row in rows[:limit]],
+        'next': next_cursor,
+    }
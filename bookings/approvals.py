@@ -0,0 +1,74 @@
+# bookings/approvals.py
+"""Manager approval queue: pending bookings of a manager's team, oldest first"""
+from datetime import datetime
+
+from django.db.models import Q
+
+from .models import Booking, TeamMembership
+
+QUEUE_PAGE_SIZE = 15
+QUEUE_MAX_FETCH = 100
+
+
+def is_team_manager(user):
+    return user.is_authenticated and TeamMembership.objects.filter(manager=user).exists()
+
+
+def manages(manager, member):
+    return TeamMembership.objects.filter(manager=manager, member=member).exists()
+
+
+def team_bookings(user, see_all=False):
+    """Bookings the user may act on: everyone's for admins, their team's otherwise"""
+    bookings = Booking.objects.all()
+    if not see_all:
+        bookings = bookings.filter(user__team_memberships__manager=user)
+    return bookings
+
+
+def encode_cursor(booking):
+    return f'{booking.booking_date.isoformat()}_{booking.pk}'
+
+
+def decode_cursor(cursor):
+    """Return (booking_date, pk) or None for a missing/malformed cursor"""
+    try:
+        timestamp, pk = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def approval_queue(user, see_all=False, newest_first=False, after=None, limit=QUEUE_PAGE_SIZE):
+    """
+    One page of pending bookings as a single joined query, served from the
+    pending-only index. ``after`` is a cursor from encode_cursor(); keyset
+    pagination keeps every page the same cost however deep the queue is.
+    """
+    bookings = (
+        team_bookings(user, see_all)
+        .filter(status='pending')
+        .select_related('user', 'conference', 'conference__location')
+    )
+
+    position = decode_cursor(after)
+    if newest_first:
+        bookings = bookings.order_by('-booking_date', '-id')
+        if position:
+            booking_date, pk = position
+            bookings = bookings.filter(
+                Q(booking_date__lt=booking_date) | Q(booking_date=booking_date, id__lt=pk)
+            )
+    else:
+        bookings = bookings.order_by('booking_date', 'id')
+        if position:
+            booking_date, pk = position
+            bookings = bookings.filter(
+                Q(booking_date__gt=booking_date) | Q(booking_date=booking_date, id__gt=pk)
+            )
+
+    limit = max(1, min(limit, QUEUE_MAX_FETCH))
+    # Fetch one extra row to know whether another page exists
+    rows = list(bookings[:limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
@@ -0,0 +1,137 @@
+# bookings/archive.py
+"""
+Retention for the Booking table.
+
+Bookings for conferences that finished more than BOOKINGS_ARCHIVE_AFTER_DAYS
+ago are copied to ArchivedBooking and deleted from Booking in batches,
+one transaction per batch. Per-conference counts are kept in
+BookingRollup, so reports still cover the whole history while the hot
+table and its indexes only hold recent rows.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ArchivedBooking, Booking, BookingRollup, Conference
+from .signals import deferred_touches
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 365
+BATCH_SIZE = 1000
+
+# ArchivedBooking field -> Booking lookup; original_id must stay first
+ARCHIVE_COLUMNS = {
+    'original_id': 'id',
+    'user_id': 'user_id',
+    'conference_id': 'conference_id',
+    'conference_title': 'conference__title',
+    'conference_starts_at': 'conference__starts_at',
+    'location_name': 'conference__location__name',
+    'status': 'status',
+    'priority': 'priority',
+    'booking_date': 'booking_date',
+    'justification': 'justification',
+    'notes': 'notes',
+    'approved_by_id': 'approved_by_id',
+    'approved_date': 'approved_date',
+    'rejection_reason': 'rejection_reason',
+}
+ROLLUP_STATUSES = ['applied', 'pending', 'approved', 'rejected', 'cancelled']
+
+
+def archive_cutoff(days=None):
+    if days is None:
+        days = getattr(settings, 'BOOKINGS_ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS)
+    return timezone.now() - timedelta(days=days)
+
+
+def archivable_conferences(cutoff):
+    """
+    Conferences that finished before ``cutoff`` and still have live booking rows.
+
+    Only dated conferences qualify: one without a start or end time may
+    still be running, and archiving its bookings would free their seats
+    and let people book again.
+    """
+    return (
+        Conference.objects.annotate(finished_at=Coalesce('ends_at', 'starts_at'))
+        .filter(finished_at__lt=cutoff)
+        .filter(Exists(Booking.objects.filter(conference=OuterRef('pk'))))
+        .order_by('finished_at')
+    )
+
+
+def archive_conference(conference_id, batch_size=BATCH_SIZE):
+    """Move one conference's bookings to the archive; returns how many moved"""
+    fields, lookups = list(ARCHIVE_COLUMNS), list(ARCHIVE_COLUMNS.values())
+    bookings = Booking.objects.filter(conference_id=conference_id).order_by('pk')
+    moved = 0
+
+    # One conference timestamp bump for the whole run instead of one per row
+    with deferred_touches():
+        while True:
+            with transaction.atomic():
+                rows = list(bookings.values_list(*lookups)[:batch_size])
+                if not rows:
+                    break
+                archived = []
+                for row in rows:
+                    values = dict(zip(fields, row))
+                    values['location_name'] = values['location_name'] or ''
+                    archived.append(ArchivedBooking(**values))
+                # ignore_conflicts makes a rerun after a crash harmless
+                ArchivedBooking.objects.bulk_create(archived, ignore_conflicts=True)
+                Booking.objects.filter(pk__in=[row[0] for row in rows]).delete()
+            moved += len(rows)
+
+    update_rollup(conference_id)
+    return moved
+
+
+def update_rollup(conference_id):
+    """Recount a conference's archived bookings into its BookingRollup"""
+    counts = dict(
+        ArchivedBooking.objects.filter(conference_id=conference_id)
+        .values_list('status')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    details = (
+        Conference.objects.filter(pk=conference_id)
+        .values('title', 'location__name', 'starts_at', 'capacity')
+        .first()
+    )
+    defaults = {status: counts.get(status, 0) for status in ROLLUP_STATUSES}
+    defaults['total'] = sum(counts.values())
+    if details:
+        defaults.update(
+            conference_title=details['title'],
+            location_name=details['location__name'] or '',
+            starts_at=details['starts_at'],
+            capacity=details['capacity'],
+        )
+    elif not BookingRollup.objects.filter(conference_id=conference_id).exists():
+        # The conference is gone; describe it from its archived rows
+        sample = (
+            ArchivedBooking.objects.filter(conference_id=conference_id)
+            .values('conference_title', 'location_name', 'conference_starts_at')
+            .first() or {}
+        )
+        defaults.update(
+            conference_title=sample.get('conference_title', ''),
+            location_name=sample.get('location_name', ''),
+            starts_at=sample.get('conference_starts_at'),
+            capacity=0,
+        )
+    rollup, _ = BookingRollup.objects.update_or_create(conference_id=conference_id, defaults=defaults)
+    return rollup
+
+
+def archived_totals():
+    """Sums over every rollup: {'total': ..., 'approved': ..., ...}"""
+    fields = ['total'] + ROLLUP_STATUSES
+    totals = BookingRollup.objects.aggregate(**{field: Sum(field) for field in fields})
+    return {field: totals[field] or 0 for field in fields}
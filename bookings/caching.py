@@ -0,0 +1,255 @@
+# bookings/caching.py
+"""HTTP conditional responses and data caches for the public conference pages"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db.models import Count, F, Max, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from .models import Conference, ConferenceCategory, Booking, Location
+
+# Cache entries are keyed on timestamps that move with every change, so
+# these timeouts only bound how long superseded entries linger
+LISTING_CACHE_TIMEOUT = 60 * 10
+AVAILABILITY_CACHE_TIMEOUT = 60 * 10
+
+# Cards shown per location on the home page; ?location= shows up to the larger limit
+LISTING_PER_LOCATION = 12
+LOCATION_LISTING_LIMIT = 120
+
+ACTIVE_STATUSES = ['pending', 'approved']
+
+
+def _user_key(request):
+    """Identify what the page looks like for this user (anonymous, user, superuser)"""
+    user = request.user
+    if not user.is_authenticated:
+        return 'anon'
+    return f'{user.pk}:{int(user.is_superuser)}:{int(user.is_staff)}'
+
+
+def _has_pending_messages(request):
+    """Pages carrying flash messages must be rendered, never answered with a 304"""
+    # len() peeks at the storage without marking the messages as used
+    return len(get_messages(request)) > 0
+
+
+def _make_etag(*parts):
+    raw = '|'.join(str(part) for part in parts)
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+# Home page
+
+def listing_state():
+    """
+    (latest change, conference count, location count, category count) for
+    the home page: the listing plus the category filter rendered above it
+    """
+    conferences = Conference.objects.aggregate(latest=Max('updated_at'), total=Count('id'))
+    locations = Location.objects.aggregate(latest=Max('updated_at'), total=Count('id'))
+    categories = ConferenceCategory.objects.aggregate(latest=Max('updated_at'), total=Count('id'))
+    latest = max(
+        (
+            ts for ts in (conferences['latest'], locations['latest'], categories['latest'])
+            if ts is not None
+        ),
+        default=None,
+    )
+    return latest, conferences['total'], locations['total'], categories['total']
+
+
+def _home_state(request):
+    """listing_state(), computed once per request"""
+    if not hasattr(request, '_home_state'):
+        request._home_state = listing_state()
+    return request._home_state
+
+
+def home_last_modified(request, *args, **kwargs):
+    if _has_pending_messages(request):
+        return None
+    return _home_state(request)[0]
+
+
+def home_etag(request, *args, **kwargs):
+    if _has_pending_messages(request):
+        return None
+    latest, conference_count, location_count, category_count = _home_state(request)
+    return _make_etag(
+        'home', latest, conference_count, location_count, category_count,
+        _user_key(request), request.GET.urlencode(),
+    )
+
+
+def annotate_seats_left(conferences):
+    """Compute remaining seats in the listing query instead of one COUNT per card"""
+    return conferences.annotate(
+        seats_left=F('capacity') - Count('booking', filter=Q(booking__status__in=ACTIVE_STATUSES))
+    )
+
+
+def group_by_location(locations, conferences, per_location=LISTING_PER_LOCATION):
+    """
+    {location: [conferences]} with at most ``per_location`` conferences per
+    location, fetched in one query. Each location gets a conference_count
+    of everything that matched, so the page can say what was left out.
+    """
+    grouped = {location: [] for location in locations}
+    by_pk = {location.pk: location for location in grouped}
+    conferences = conferences.filter(location__in=list(by_pk))
+
+    totals = dict(conferences.order_by().values_list('location_id').annotate(total=Count('id')))
+    for location in grouped:
+        location.conference_count = totals.get(location.pk, 0)
+
+    # Rank within each location in the listing's order and keep the first
+    # rows, so the database never hands back the whole table
+    ordering = conferences.query.order_by or ['pk']
+    ranked = annotate_seats_left(conferences).annotate(
+        location_rank=Window(RowNumber(), partition_by=F('location_id'), order_by=ordering),
+    ).filter(location_rank__lte=per_location)
+    for conference in ranked:
+        grouped[by_pk[conference.location_id]].append(conference)
+    return grouped
+
+
+def get_conference_listing(request=None):
+    """Unfiltered home page listing, cached until a conference or location changes"""
+    state = _home_state(request) if request is not None else listing_state()
+    key = f'listing:{_make_etag(*state)}'
+    listing = cache.get(key)
+    if listing is None:
+        listing = group_by_location(
+            Location.objects.all(),
+            Conference.objects.filter(deletion_requested_at__isnull=True).order_by('created_at'),
+        )
+        cache.set(key, listing, LISTING_CACHE_TIMEOUT)
+    return listing
+
+
+# Conference detail and availability
+
+def _availability_key(pk, updated_at):
+    return f'availability:{pk}:{updated_at.timestamp()}'
+
+
+def get_available_seats(conference):
+    """Conference.available_seats(), cached until the conference changes"""
+    key = _availability_key(conference.pk, conference.updated_at)
+    seats = cache.get(key)
+    if seats is None:
+        seats = conference.available_seats()
+        cache.set(key, seats, AVAILABILITY_CACHE_TIMEOUT)
+    return seats
+
+
+def prime_availability():
+    """Fill the availability cache for every conference with two queries"""
+    booked = dict(
+        Booking.objects.filter(status__in=ACTIVE_STATUSES)
+        .values_list('conference')
+        .annotate(total=Count('id'))
+    )
+    entries = {
+        _availability_key(pk, updated_at): capacity - booked.get(pk, 0)
+        for pk, capacity, updated_at in Conference.objects.values_list('pk', 'capacity', 'updated_at')
+    }
+    cache.set_many(entries, AVAILABILITY_CACHE_TIMEOUT)
+    return len(entries)
+
+
+def _conference_state(request, pk):
+    """
+    (updated_at, transitions) for a conference, fetched once per request
+    without loading the row, or None if it doesn't exist. ``transitions``
+    are the times at which the page changes without the row changing:
+    lottery applications closing and the conference ending.
+    """
+    cache = request.__dict__.setdefault('_conference_state', {})
+    if pk not in cache:
+        row = Conference.objects.filter(pk=pk).values_list(
+            'updated_at', 'allocation_mode', 'allocated_at', 'applications_close_at', 'ends_at',
+        ).first()
+        if row is None:
+            cache[pk] = None
+        else:
+            updated_at, allocation_mode, allocated_at, close_at, ends_at = row
+            transitions = [ends_at]
+            if allocation_mode == 'lottery' and allocated_at is None:
+                transitions.append(close_at)
+            cache[pk] = updated_at, sorted(ts for ts in transitions if ts is not None)
+    return cache[pk]
+
+
+def conference_last_modified(request, pk, *args, **kwargs):
+    if _has_pending_messages(request):
+        return None
+    state = _conference_state(request, pk)
+    if state is None:
+        return None
+    # A transition that has passed changed the page as much as an edit would
+    updated_at, transitions = state
+    now = timezone.now()
+    return max([updated_at] + [ts for ts in transitions if ts <= now])
+
+
+def conference_etag(request, pk, *args, **kwargs):
+    if _has_pending_messages(request):
+        return None
+    state = _conference_state(request, pk)
+    if state is None:
+        return None
+    updated_at, transitions = state
+    passed = sum(1 for ts in transitions if ts <= timezone.now())
+    return _make_etag('conference', pk, updated_at, passed, _user_key(request))
+
+
+def conference_max_age(request, pk, *args, **kwargs):
+    """Seconds until the page next changes by itself, or None if it never does"""
+    state = _conference_state(request, pk)
+    now = timezone.now()
+    upcoming = [ts for ts in state[1] if ts > now] if state else []
+    return int((upcoming[0] - now).total_seconds()) if upcoming else None
+
+
+def availability_etag(request, pk, *args, **kwargs):
+    state = _conference_state(request, pk)
+    if state is None:
+        return None
+    return _make_etag('availability', pk, state[0])
+
+
+def conditional_page(etag_func=None, last_modified_func=None, max_age_func=None):
+    """
+    condition() plus caching headers: anonymous responses may be cached
+    publicly for a short while, authenticated ones must be revalidated.
+    ``max_age_func`` may shorten the public lifetime to when the page next
+    changes on its own.
+    """
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view_func)
+
+        @wraps(view_func)
+        def inner(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.status_code not in (200, 304) or not response.has_header('ETag'):
+                return response
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                max_age = getattr(settings, 'BOOKINGS_PUBLIC_CACHE_SECONDS', 60)
+                until_change = max_age_func(request, *args, **kwargs) if max_age_func else None
+                if until_change is not None:
+                    max_age = max(0, min(max_age, until_change))
+                patch_cache_control(response, public=True, max_age=max_age)
+            patch_vary_headers(response, ['Cookie'])
+            return response
+        return inner
+    return decorator
@@ -0,0 +1,128 @@
+# bookings/conflicts.py
+"""
+Scheduling conflicts: two conferences in the same room at the same time,
+or one user holding bookings for conferences that overlap.
+
+Intervals are half-open, [starts_at, ends_at), so back-to-back events
+do not conflict.
+"""
+import heapq
+from collections import namedtuple
+
+from django.db.models import Exists, OuterRef, Q
+
+from .models import Booking, Conference
+
+ACTIVE_STATUSES = ('pending', 'approved')
+
+Conflict = namedtuple('Conflict', 'group first second overlap_start overlap_end')
+
+
+def overlaps(starts_at, ends_at, prefix=''):
+    """Q matching intervals that overlap [starts_at, ends_at)"""
+    return Q(**{f'{prefix}starts_at__lt': ends_at, f'{prefix}ends_at__gt': starts_at})
+
+
+def room_conflict(location_id, starts_at, ends_at, exclude_pk=None):
+    """
+    The conference already holding the room during [starts_at, ends_at), or None.
+
+    Assumes conferences in a room never overlap each other (this check is
+    what keeps it that way), so ordered by start they are ordered by end
+    too. Only the last one starting before ``ends_at`` can reach past
+    ``starts_at``, and finding it is a single seek on the (location,
+    starts_at) index.
+
+    The check runs in form validation, before and outside the save, so two
+    overlapping conferences saved at the same moment, or rows that predate
+    the check, can still break the assumption; ``manage.py conflict_report``
+    finds those. Conferences without an end time take up no slot.
+    """
+    scheduled = Conference.objects.filter(
+        location_id=location_id, starts_at__isnull=False, ends_at__isnull=False,
+    )
+    if exclude_pk is not None:
+        scheduled = scheduled.exclude(pk=exclude_pk)
+    previous = (
+        scheduled.filter(starts_at__lt=ends_at)
+        .order_by('-starts_at')
+        .only('pk', 'title', 'starts_at', 'ends_at')
+        .first()
+    )
+    if previous is not None and previous.ends_at > starts_at:
+        return previous
+    return None
+
+
+def user_conflict(user, conference):
+    """A live booking of the user's whose conference overlaps ``conference``, or None"""
+    if conference.starts_at is None or conference.ends_at is None:
+        return None
+    return (
+        Booking.objects.filter(user=user, status__in=ACTIVE_STATUSES)
+        .exclude(conference=conference)
+        .filter(overlaps(conference.starts_at, conference.ends_at, prefix='conference__'))
+        .select_related('conference')
+        .first()
+    )
+
+
+def clashing_applications(conference):
+    """
+    Ids of open lottery applications to ``conference`` whose applicant
+    already holds a live booking that overlaps it. Applying is not checked
+    by user_conflict (a lottery may be lost), so this runs at the draw.
+    """
+    if conference.starts_at is None or conference.ends_at is None:
+        return set()
+    held = (
+        Booking.objects.filter(user=OuterRef('user'), status__in=ACTIVE_STATUSES)
+        .exclude(conference=conference)
+        .filter(overlaps(conference.starts_at, conference.ends_at, prefix='conference__'))
+    )
+    return set(
+        Booking.objects.filter(conference=conference, status='applied')
+        .filter(Exists(held))
+        .values_list('pk', flat=True)
+    )
+
+
+def sweep(intervals):
+    """
+    Yield a Conflict for every overlapping pair in ``intervals``, an
+    iterable of (group, starts_at, ends_at, item) sorted by group then
+    starts_at. Intervals still open are kept in a heap keyed by end, so the
+    cost is O(n log n) plus the number of conflicts found.
+    """
+    current_group, open_intervals = object(), []
+    for position, (group, starts_at, ends_at, item) in enumerate(intervals):
+        if group != current_group:
+            current_group, open_intervals = group, []
+        while open_intervals and open_intervals[0][0] <= starts_at:
+            heapq.heappop(open_intervals)
+        for other_end, _, other_item in open_intervals:
+            yield Conflict(group, other_item, item, starts_at, min(ends_at, other_end))
+        heapq.heappush(open_intervals, (ends_at, position, item))
+
+
+def room_conflicts():
+    """Every pair of conferences double-booked into the same location"""
+    rows = (
+        Conference.objects.filter(location__isnull=False, starts_at__isnull=False, ends_at__isnull=False)
+        .order_by('location_id', 'starts_at')
+        .values_list('location__name', 'starts_at', 'ends_at', 'title')
+    )
+    return sweep(rows.iterator(chunk_size=2000))
+
+
+def user_conflicts():
+    """Every pair of live bookings by one user for overlapping conferences"""
+    rows = (
+        Booking.objects.filter(
+            status__in=ACTIVE_STATUSES,
+            conference__starts_at__isnull=False, conference__ends_at__isnull=False,
+        )
+        .order_by('user_id', 'conference__starts_at')
+        .values_list('user__username', 'conference__starts_at', 'conference__ends_at', 'conference__title')
+    )
+    return sweep(rows.iterator(chunk_size=2000))
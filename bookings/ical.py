@@ -0,0 +1,203 @@
+# bookings/ical.py
+"""iCalendar (RFC 5545) feeds of approved bookings, generated as a stream"""
+import hashlib
+from datetime import timezone
+
+from django.core import signing
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+
+from .models import ArchivedBooking, Booking, BookingRollup, Conference, Location
+
+PRODID = '-//Conference Booking//Calendar Feed//EN'
+FEED_SALT = 'bookings.calendar-feed'
+
+# Conference columns needed to render an event; fetched with values() so
+# no model instances are built, even for feeds with thousands of events.
+# Each feed adds conference_id, location_name and stamp (the DTSTAMP).
+EVENT_FIELDS = ['title', 'description', 'starts_at', 'ends_at']
+
+
+def user_feed_token(user):
+    """Unguessable token identifying a user's feed, so calendar apps need no login"""
+    return signing.Signer(salt=FEED_SALT).sign(str(user.pk))
+
+
+def user_id_from_token(token):
+    """The user id a feed token was issued for, or None if it was tampered with"""
+    try:
+        return int(signing.Signer(salt=FEED_SALT).unsign(token))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def escape_text(value):
+    return (
+        value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """Fold a content line to 75 octets per RFC 5545 section 3.1"""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Never split a multi-byte UTF-8 character
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode())
+        start, limit = end, 74  # continuation lines start with a space
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def format_datetime(value):
+    return value.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def event_lines(event, host, description=None):
+    ends_at = event['ends_at'] or event['starts_at']
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:conference-{event["conference_id"]}@{host}',
+        f'DTSTAMP:{format_datetime(event["stamp"])}',
+        f'DTSTART:{format_datetime(event["starts_at"])}',
+        f'DTEND:{format_datetime(ends_at)}',
+        f'SUMMARY:{escape_text(event["title"])}',
+        f'DESCRIPTION:{escape_text(description or event["description"])}',
+    ]
+    if event['location_name']:
+        lines.append(f'LOCATION:{escape_text(event["location_name"])}')
+    lines.append('END:VEVENT')
+    return lines
+
+
+def stream_calendar(name, events, host, chunk_events=100):
+    """
+    Yield the calendar in chunks of ``chunk_events`` events; ``events`` is
+    consumed lazily, so a server-side iterator keeps memory flat
+    """
+    header = ['BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN',
+              f'X-WR-CALNAME:{escape_text(name)}']
+    yield ''.join(fold(line) for line in header)
+
+    chunk = []
+    for count, (event, description) in enumerate(events, start=1):
+        chunk.extend(fold(line) for line in event_lines(event, host, description))
+        if count % chunk_events == 0:
+            yield ''.join(chunk)
+            chunk = []
+    chunk.append(fold('END:VCALENDAR'))
+    yield ''.join(chunk)
+
+
+# Feed contents
+
+def user_bookings(user_id):
+    return Booking.objects.filter(
+        user_id=user_id, status='approved', conference__starts_at__isnull=False,
+    )
+
+
+def _live_conference(field):
+    """A column of an archived booking's conference, while the conference still exists"""
+    return Subquery(Conference.objects.filter(pk=OuterRef('conference_id')).values(field)[:1])
+
+
+def archived_user_bookings(user_id):
+    """
+    Past approved bookings moved out by archive_bookings. They stay in the
+    feed, or calendar apps would delete the events on the next refresh.
+    Details come from the copy in the archive row; the description and end
+    time from the conference while it still exists.
+    """
+    return ArchivedBooking.objects.filter(
+        user_id=user_id, status='approved', conference_starts_at__isnull=False,
+    ).annotate(
+        event_title=F('conference_title'),
+        event_description=Coalesce(_live_conference('description'), Value(''), output_field=TextField()),
+        event_starts_at=F('conference_starts_at'),
+        event_ends_at=_live_conference('ends_at'),
+    )
+
+
+def user_events(user_id):
+    # Stamped with the booking, not the conference: the conference's
+    # updated_at moves whenever anyone books it
+    archived = archived_user_bookings(user_id).order_by('conference_starts_at').values(
+        'conference_id', 'location_name',
+        stamp=Coalesce('approved_date', 'booking_date'),
+        **{field: F(f'event_{field}') for field in EVENT_FIELDS},
+    )
+    live = user_bookings(user_id).order_by('conference__starts_at').values(
+        'conference_id',
+        location_name=F('conference__location__name'),
+        stamp=Coalesce('approved_date', 'booking_date'),
+        **{field: F(f'conference__{field}') for field in EVENT_FIELDS},
+    )
+    for rows in (archived, live):
+        for row in rows.iterator(chunk_size=500):
+            yield row, None
+
+
+def location_conferences(location_id):
+    """Scheduled conferences at a location with at least one approved booking"""
+    # Archived bookings only survive as counts in the conference's rollup
+    archived = BookingRollup.objects.filter(conference_id=OuterRef('pk')).values('approved')[:1]
+    return (
+        Conference.objects.filter(location_id=location_id, starts_at__isnull=False)
+        .annotate(attendees=Count('booking', filter=Q(booking__status='approved')) + Coalesce(Subquery(archived), 0))
+        .filter(attendees__gt=0)
+    )
+
+
+def location_events(location_id):
+    rows = location_conferences(location_id).order_by('starts_at').values(
+        *EVENT_FIELDS, 'attendees', conference_id=F('pk'), location_name=F('location__name'),
+        stamp=F('updated_at'),
+    )
+    for row in rows.iterator(chunk_size=500):
+        yield row, f'{row["attendees"]} approved attendee(s)\n\n{row["description"]}'
+
+
+# Validators for conditional requests
+
+def _digest(*parts):
+    raw = '|'.join(str(part) for part in parts)
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def user_feed_version(user_id):
+    """
+    Digest of exactly what the user's feed shows: their approved bookings
+    (live and archived) and those conferences' event fields. Other people
+    booking the same conferences leaves it unchanged.
+    """
+    live = user_bookings(user_id).order_by().values_list(
+        'pk', 'approved_date', 'booking_date', 'conference_id', 'conference__location__name',
+        *[f'conference__{field}' for field in EVENT_FIELDS],
+    )
+    archived = archived_user_bookings(user_id).order_by().values_list(
+        'original_id', 'approved_date', 'booking_date', 'conference_id', 'location_name',
+        *[f'event_{field}' for field in EVENT_FIELDS],
+    )
+    # One query for both tables; archived rows keep their original booking id
+    rows = sorted(live.union(archived, all=True), key=lambda row: row[0])
+    return _digest('user', user_id, *rows)
+
+
+def location_feed_version(location_id):
+    """
+    Changes whenever the location (its name is the calendar's name) or a
+    conference there (or one of its bookings) changes
+    """
+    state = (
+        Location.objects.filter(pk=location_id)
+        .annotate(total=Count('conference'), changed=Max('conference__updated_at'))
+        .values_list('updated_at', 'total', 'changed')
+        .first()
+    )
+    return _digest('location', location_id, state)
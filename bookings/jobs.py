@@ -0,0 +1,205 @@
+# bookings/jobs.py
+"""
+Database-backed background jobs.
+
+Views call enqueue() (a single INSERT) and hand the user a job page to
+poll; the run_jobs management command claims queued jobs and runs the
+handler registered for their kind. Failed jobs are retried with
+exponential backoff until max_attempts is reached.
+"""
+import logging
+import traceback
+from dataclasses import asdict
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Booking, Conference, Job
+from .signals import deferred_touches
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+FAILURE_HANDLERS = {}
+
+RETRY_BASE_DELAY = 30  # seconds, doubled on every attempt
+STALE_AFTER = timedelta(hours=1)  # running jobs older than this are presumed dead
+DELETE_BATCH_SIZE = 1000
+EXPORT_BATCH_SIZE = 2000
+
+
+def register(kind, on_failure=None):
+    """
+    Register the decorated function as the handler for ``kind`` jobs.
+    ``on_failure(job)`` runs once a job has used up all its attempts.
+    """
+    def decorator(func):
+        HANDLERS[kind] = func
+        if on_failure is not None:
+            FAILURE_HANDLERS[kind] = on_failure
+        return func
+    return decorator
+
+
+def enqueue(kind, payload=None, user=None, max_attempts=3, unique=False):
+    """
+    Queue a job. With ``unique``, a queued or running job of the same kind
+    and payload is returned instead of adding a duplicate.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f'No job handler registered for "{kind}"')
+    if unique:
+        pending = Job.objects.filter(
+            kind=kind, payload=payload or {}, status__in=['queued', 'running'],
+        ).order_by('pk').first()
+        if pending is not None:
+            return pending
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        created_by=user if user is not None and user.is_authenticated else None,
+        max_attempts=max_attempts,
+    )
+
+
+def claim_next():
+    """
+    Atomically move the next runnable job to 'running' and return it.
+
+    The conditional UPDATE acts as compare-and-swap, so several workers can
+    poll the same table without SELECT ... FOR UPDATE support.
+    """
+    now = timezone.now()
+    candidates = (
+        Job.objects.filter(status='queued', run_after__lte=now)
+        .order_by('run_after', 'id')
+        .values_list('pk', flat=True)[:10]
+    )
+    for pk in candidates:
+        claimed = Job.objects.filter(pk=pk, status='queued').update(
+            status='running', started_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def requeue_stale():
+    """Put back jobs whose worker died mid-run"""
+    return Job.objects.filter(
+        status='running', started_at__lt=timezone.now() - STALE_AFTER,
+    ).update(status='queued', run_after=timezone.now())
+
+
+def run_job(job):
+    """Run a claimed job and record the outcome"""
+    handler = HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f'No job handler registered for "{job.kind}"')
+        result = handler(job)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Job %s failed (attempt %s/%s)', job.pk, job.attempts, job.max_attempts)
+        if job.attempts < job.max_attempts:
+            delay = RETRY_BASE_DELAY * 2 ** (job.attempts - 1)
+            Job.objects.filter(pk=job.pk).update(
+                status='queued', error=error,
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status='failed', error=error, finished_at=timezone.now(),
+            )
+            on_failure = FAILURE_HANDLERS.get(job.kind)
+            if on_failure is not None:
+                try:
+                    on_failure(job)
+                except Exception:
+                    logger.exception('Failure handler for job %s failed', job.pk)
+        return False
+
+    Job.objects.filter(pk=job.pk).update(
+        status='succeeded', progress=100, result=result, error='', finished_at=timezone.now(),
+    )
+    return True
+
+
+# Handlers
+
+def cancel_conference_deletion(job):
+    """The deletion gave up: list the conference again, with whatever bookings are left"""
+    now = timezone.now()
+    Conference.objects.filter(pk=job.payload['conference_id']).update(
+        deletion_requested_at=None, updated_at=now,
+    )
+
+
+@register('delete_conference', on_failure=cancel_conference_deletion)
+def delete_conference(job):
+    """Delete a conference's bookings in batches, then the conference itself"""
+    conference_id = job.payload['conference_id']
+    bookings = Booking.objects.filter(conference_id=conference_id)
+    total = bookings.count()
+    deleted = 0
+
+    with deferred_touches():
+        while True:
+            batch = list(bookings.values_list('pk', flat=True)[:DELETE_BATCH_SIZE])
+            if not batch:
+                break
+            Booking.objects.filter(pk__in=batch).delete()
+            deleted += len(batch)
+            job.set_progress(deleted * 100 / (total + 1), f'Deleted {deleted} of {total} bookings')
+
+    Conference.objects.filter(pk=conference_id).delete()
+    return {'bookings_deleted': deleted}
+
+
+@register('export_bookings')
+def export_bookings(job):
+    """Write every booking to a CSV file in default storage"""
+    import csv
+    import io
+    import tempfile
+
+    bookings = Booking.objects.select_related('user', 'conference', 'approved_by').order_by('pk')
+    total = bookings.count()
+    # Spool to a temporary file so large exports don't sit in worker memory
+    spool = tempfile.TemporaryFile()
+    buffer = io.TextIOWrapper(spool, encoding='utf-8', newline='')
+    writer = csv.writer(buffer)
+    writer.writerow([
+        'User', 'Email', 'Department', 'Conference',
+        'Booking Status', 'Booking Date', 'Approved By'
+    ])
+
+    for written, booking in enumerate(bookings.iterator(chunk_size=EXPORT_BATCH_SIZE), start=1):
+        writer.writerow([
+            booking.user.get_full_name() or booking.user.username,
+            booking.user.email,
+            getattr(booking.user, 'department', 'N/A'),
+            booking.conference.title,
+            booking.get_status_display(),
+            booking.booking_date.strftime('%Y-%m-%d %H:%M'),
+            booking.approved_by.get_full_name() if booking.approved_by else '',
+        ])
+        if written % EXPORT_BATCH_SIZE == 0:
+            job.set_progress(written * 100 / (total + 1), f'Exported {written} of {total} bookings')
+
+    buffer.flush()
+    spool.seek(0)
+    with buffer:
+        name = default_storage.save(f'exports/bookings_export_{job.pk}.csv', File(spool))
+    return {'file': name, 'rows': total}
+
+
+@register('rebuild_capacity_forecast')
+def rebuild_capacity_forecast(job):
+    """Recompute the reports page capacity recommendations"""
+    from .analytics import forecast_by_location
+
+    return {'forecasts': [asdict(forecast) for forecast in forecast_by_location()]}
@@ -0,0 +1,144 @@
+# bookings/lottery.py
+"""
+Seat allocation for lottery conferences.
+
+Instead of racing for seats when booking opens, people apply while the
+window is open; once it closes, allocate() draws the winners in one
+pass. The draw uses weighted random sampling without replacement
+(Efraimidis & Spirakis): every application gets the key -ln(u) / weight
+and the seats go to the smallest keys. With equal weights this is a
+plain uniform lottery. Everything is derived from one seed, so a draw
+can be replayed exactly.
+"""
+import heapq
+import math
+import random
+import secrets
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .conflicts import clashing_applications
+from .models import Booking, Conference
+from .signals import touch_conferences
+
+PRIORITY_WEIGHTS = {'low': 0.5, 'medium': 1.0, 'high': 2.0, 'critical': 4.0}
+UPDATE_BATCH_SIZE = 1000
+NOT_DRAWN_REASON = 'Not drawn in the lottery for this conference.'
+CLASH_REASON = 'You already hold a seat at a conference at the same time.'
+
+
+class AllocationError(Exception):
+    pass
+
+
+@dataclass
+class Allocation:
+    conference_id: int
+    seed: int
+    applications: int
+    seats: int
+    winners: list
+    # Applicants left out of the draw for holding an overlapping seat
+    clashing: list = field(default_factory=list)
+
+
+def draw(applications, seats, seed):
+    """
+    Winning ids from ``applications``, a list of (id, weight) pairs.
+
+    The result depends only on the pairs and the seed: applications are
+    sorted by id before any random numbers are drawn.
+    """
+    rng = random.Random(seed)
+    keyed = (
+        # 1 - random() lies in (0, 1], so the logarithm is always defined
+        (-math.log(1.0 - rng.random()) / weight, pk)
+        for pk, weight in sorted(applications)
+        if weight > 0
+    )
+    return [pk for _, pk in heapq.nsmallest(seats, keyed)]
+
+
+def application_weights(conference):
+    """(booking id, weight) for every open application to ``conference``"""
+    applications = Booking.objects.filter(conference=conference, status='applied')
+
+    if conference.lottery_weighting == 'priority':
+        return [
+            (pk, PRIORITY_WEIGHTS.get(priority, 1.0))
+            for pk, priority in applications.values_list('pk', 'priority')
+        ]
+
+    rows = list(applications.values_list('pk', 'user_id'))
+    if conference.lottery_weighting == 'first_timers':
+        # One grouped query for everyone's attendance history
+        attended = dict(
+            Booking.objects.filter(status='approved', user_id__in=applications.values('user_id'))
+            .values_list('user_id')
+            .annotate(total=Count('id'))
+        )
+        return [(pk, 1.0 / (1 + attended.get(user_id, 0))) for pk, user_id in rows]
+    return [(pk, 1.0) for pk, _ in rows]
+
+
+def allocate(conference, seed=None, dry_run=False):
+    """
+    Run the lottery for a conference whose application window has closed.
+
+    Winners move to 'pending' (or straight to 'approved' when the
+    conference needs no approval); everyone else is rejected. Applicants
+    who meanwhile got a seat at an overlapping conference (another lottery
+    included) are left out of the draw.
+    """
+    if conference.allocation_mode != 'lottery':
+        raise AllocationError(f'"{conference}" is not a lottery conference.')
+    if conference.allocated_at is not None:
+        raise AllocationError(f'Seats for "{conference}" were already allocated.')
+    if conference.applications_open():
+        raise AllocationError(f'Applications for "{conference}" are still open.')
+
+    seed = secrets.randbits(63) if seed is None else seed
+    applications = application_weights(conference)
+    clashing = clashing_applications(conference)
+    eligible = [(pk, weight) for pk, weight in applications if pk not in clashing]
+    taken = Booking.objects.filter(conference=conference, status__in=['pending', 'approved']).count()
+    seats = max(0, conference.capacity - taken)
+    allocation = Allocation(
+        conference.pk, seed, len(applications), seats, draw(eligible, seats, seed), sorted(clashing),
+    )
+    if dry_run:
+        return allocation
+
+    now = timezone.now()
+    status = 'pending' if conference.requires_approval else 'approved'
+    winners = [
+        Booking(pk=pk, status=status, approved_date=None if conference.requires_approval else now)
+        for pk in allocation.winners
+    ]
+    with transaction.atomic():
+        # Claiming the conference first stops two concurrent runs both drawing
+        claimed = Conference.objects.filter(pk=conference.pk, allocated_at__isnull=True).update(
+            allocated_at=now, allocation_seed=seed,
+        )
+        if not claimed:
+            raise AllocationError(f'Seats for "{conference}" were already allocated.')
+        Booking.objects.bulk_update(winners, ['status', 'approved_date'], batch_size=UPDATE_BATCH_SIZE)
+        Booking.objects.filter(pk__in=allocation.clashing, status='applied').update(
+            status='rejected', rejection_reason=CLASH_REASON,
+        )
+        Booking.objects.filter(conference=conference, status='applied').update(
+            status='rejected', rejection_reason=NOT_DRAWN_REASON,
+        )
+        # bulk_update() and update() send no signals
+        touch_conferences([conference.pk])
+    return allocation
+
+
+def due_conferences():
+    """Lottery conferences whose window has closed but which haven't been drawn"""
+    return Conference.objects.filter(
+        allocation_mode='lottery', allocated_at__isnull=True, applications_close_at__lte=timezone.now(),
+    ).order_by('applications_close_at')
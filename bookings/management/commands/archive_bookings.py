@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.archive import BATCH_SIZE, archivable_conferences, archive_conference, archive_cutoff
+from bookings.models import Booking
+
+
+class Command(BaseCommand):
+    help = 'Move bookings for long-finished conferences into the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Archive conferences that ended more than this many days ago')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Bookings moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be archived')
+
+    def handle(self, *args, **options):
+        if options['days'] is not None and options['days'] < 0:
+            raise CommandError('--days must not be negative.')
+        cutoff = archive_cutoff(options['days'])
+        conferences = list(archivable_conferences(cutoff).values_list('pk', 'title'))
+        if not conferences:
+            self.stdout.write(f'Nothing finished before {cutoff:%Y-%m-%d} is left to archive.')
+            return
+
+        start = time.perf_counter()
+        total = 0
+        for pk, title in conferences:
+            if options['dry_run']:
+                moved = Booking.objects.filter(conference_id=pk).count()
+            else:
+                moved = archive_conference(pk, batch_size=options['batch_size'])
+            total += moved
+            self.stdout.write(f'  {title}: {moved} booking(s)')
+
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {total} booking(s) from {len(conferences)} conference(s) '
+            f'in {time.perf_counter() - start:.2f}s.'
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bookings.conflicts import room_conflicts, user_conflicts
+
+
+class Command(BaseCommand):
+    help = 'List double-booked rooms and users booked into overlapping conferences'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms-only', action='store_true', help='Skip the per-user check')
+        parser.add_argument('--users-only', action='store_true', help='Skip the per-room check')
+
+    def handle(self, *args, **options):
+        total = 0
+        checks = []
+        if not options['users_only']:
+            checks.append(('Room conflicts', room_conflicts))
+        if not options['rooms_only']:
+            checks.append(('User conflicts', user_conflicts))
+
+        for heading, find in checks:
+            self.stdout.write(self.style.MIGRATE_HEADING(heading))
+            found = 0
+            for conflict in find():
+                found += 1
+                self.stdout.write(
+                    f'  {conflict.group}: "{conflict.first}" and "{conflict.second}" overlap '
+                    f'{self._format(conflict.overlap_start)} - {self._format(conflict.overlap_end)}'
+                )
+            if not found:
+                self.stdout.write('  None')
+            total += found
+
+        if total:
+            self.stdout.write(self.style.WARNING(f'{total} conflict(s) found.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No conflicts found.'))
+
+    @staticmethod
+    def _format(value):
+        return f'{timezone.localtime(value):%Y-%m-%d %H:%M}'
@@ -0,0 +1,45 @@
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.analytics import forecast_by_location, load_history
+
+
+class Command(BaseCommand):
+    help = 'Recommend a capacity for new conferences at each location from booking history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--location', help='Only show the location with this name')
+
+    def handle(self, *args, **options):
+        try:
+            start = time.perf_counter()
+            history = load_history()
+            loaded = time.perf_counter()
+            forecasts = forecast_by_location(history)
+            done = time.perf_counter()
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+
+        if options['location']:
+            forecasts = [f for f in forecasts if f.location_name == options['location']]
+            if not forecasts:
+                raise CommandError(f'No booking history for location "{options["location"]}".')
+
+        self.stdout.write(
+            f'{"Location":<30} {"Confs":>6} {"Demand":>8} {"Fill":>6} {"Cancel":>7} '
+            f'{"Sold out":>9} {"Hrs to sellout":>15} {"Recommended":>12}'
+        )
+        for f in forecasts:
+            hours = f'{f.median_hours_to_sellout:.1f}' if f.median_hours_to_sellout is not None else '-'
+            self.stdout.write(
+                f'{f.location_name[:30]:<30} {f.conferences:>6} {f.median_demand:>8.0f} '
+                f'{f.mean_fill_rate:>6.0%} {f.cancellation_rate:>7.0%} {f.sellout_rate:>9.0%} '
+                f'{hours:>15} {f.recommended_capacity or "-":>12}'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(history["booking_conference"])} bookings loaded in {loaded - start:.2f}s, '
+            f'forecast computed in {done - loaded:.2f}s.'
+        ))
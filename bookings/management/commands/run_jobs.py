@@ -0,0 +1,53 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from bookings.jobs import claim_next, requeue_stale, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (conference deletion, exports, report rebuilds)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Number of worker threads')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is drained')
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        requeue_stale()
+        self.stdout.write(f'Starting {options["workers"]} job worker(s).')
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            futures = [
+                pool.submit(self.work, options['poll_interval'], options['once'])
+                for _ in range(options['workers'])
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            except KeyboardInterrupt:
+                self.stop.set()
+                self.stdout.write('Stopping after the current jobs finish...')
+        self.stdout.write(self.style.SUCCESS('Job workers stopped.'))
+
+    def work(self, poll_interval, once):
+        """Worker thread loop; each thread uses its own database connection"""
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                job = claim_next()
+                if job is None:
+                    if once:
+                        return
+                    self.stop.wait(poll_interval)
+                    continue
+                started = time.perf_counter()
+                succeeded = run_job(job)
+                self.stdout.write(
+                    f'{job} {"succeeded" if succeeded else "failed"} in {time.perf_counter() - started:.1f}s'
+                )
+        finally:
+            close_old_connections()
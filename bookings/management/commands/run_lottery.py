@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.lottery import AllocationError, allocate, due_conferences
+from bookings.models import Conference
+
+
+class Command(BaseCommand):
+    help = 'Draw seats for lottery conferences whose application window has closed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--conference', type=int, help='Only draw this conference (by id)')
+        parser.add_argument('--seed', type=int, help='Seed for the draw, to replay a previous allocation')
+        parser.add_argument('--dry-run', action='store_true', help='Show the outcome without saving it')
+
+    def handle(self, *args, **options):
+        if options['conference']:
+            try:
+                conferences = [Conference.objects.get(pk=options['conference'])]
+            except Conference.DoesNotExist:
+                raise CommandError(f'Conference {options["conference"]} does not exist.')
+        else:
+            conferences = list(due_conferences())
+            if not conferences:
+                self.stdout.write('No lotteries are due.')
+                return
+
+        for conference in conferences:
+            start = time.perf_counter()
+            try:
+                allocation = allocate(conference, seed=options['seed'], dry_run=options['dry_run'])
+            except AllocationError as e:
+                self.stderr.write(self.style.ERROR(str(e)))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f'{conference.title}: {len(allocation.winners)} of {allocation.applications} applicants '
+                f'drawn for {allocation.seats} seats (seed {allocation.seed}) '
+                + (f'with {len(allocation.clashing)} left out for overlapping seats ' if allocation.clashing else '')
+                + f'in {time.perf_counter() - start:.2f}s'
+                + (' [dry run]' if options['dry_run'] else '')
+            ))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bookings.warmup import compile_templates, load_urlconf, prime_caches
+
+
+class Command(BaseCommand):
+    help = 'Pre-compile templates, build the URL resolver and prime the listing/availability caches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--skip-caches', action='store_true',
+            help='Do not touch the database, only warm templates and URLs',
+        )
+
+    def handle(self, *args, **options):
+        steps = [
+            ('templates compiled', lambda: len(compile_templates())),
+            ('URL reverse entries built', load_urlconf),
+        ]
+        if not options['skip_caches']:
+            steps.append(('conference availabilities cached', prime_caches))
+
+        for label, step in steps:
+            start = time.perf_counter()
+            count = step()
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stdout.write(f'{count} {label} in {elapsed:.1f} ms')
+        self.stdout.write(self.style.SUCCESS('Warmup complete.'))
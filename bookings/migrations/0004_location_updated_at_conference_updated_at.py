@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_remove_conference_category_remove_conference_date_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conference',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_location_updated_at_conference_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['booking_date', 'id'], name='booking_pending_queue_idx'),
+        ),
+        migrations.AddField(
+            model_name='teammembership',
+            name='manager',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='managed_memberships', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='teammembership',
+            name='member',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='team_memberships', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='teammembership',
+            unique_together={('manager', 'member')},
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conference',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conference',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
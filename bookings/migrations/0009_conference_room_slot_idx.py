@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_conference_starts_at_ends_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='conference',
+            index=models.Index(fields=['location', 'starts_at'], name='conference_room_slot_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_conference_room_slot_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='priority',
+            field=models.CharField(choices=[('low', 'Low Priority'), ('medium', 'Medium Priority'), ('high', 'High Priority'), ('critical', 'Critical')], default='medium', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='conference',
+            name='allocated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conference',
+            name='allocation_mode',
+            field=models.CharField(choices=[('first_come', 'First come, first served'), ('lottery', 'Lottery after applications close')], default='first_come', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='conference',
+            name='allocation_seed',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conference',
+            name='applications_close_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conference',
+            name='lottery_weighting',
+            field=models.CharField(choices=[('uniform', 'Equal chance for everyone'), ('priority', 'Weighted by booking priority'), ('first_timers', 'Favour people who attended less')], default='uniform', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='status',
+            field=models.CharField(choices=[('applied', 'Lottery Entry'), ('pending', 'Pending Approval'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('cancelled', 'Cancelled')], default='pending', max_length=20),
+        ),
+    ]
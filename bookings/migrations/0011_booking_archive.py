@@ -0,0 +1,58 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0010_conference_lottery'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('conference_id', models.PositiveIntegerField(unique=True)),
+                ('conference_title', models.CharField(max_length=200)),
+                ('location_name', models.CharField(blank=True, max_length=100)),
+                ('starts_at', models.DateTimeField(blank=True, null=True)),
+                ('capacity', models.PositiveIntegerField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('applied', models.PositiveIntegerField(default=0)),
+                ('pending', models.PositiveIntegerField(default=0)),
+                ('approved', models.PositiveIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+                ('cancelled', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.PositiveIntegerField(unique=True)),
+                ('conference_id', models.PositiveIntegerField(db_index=True)),
+                ('conference_title', models.CharField(max_length=200)),
+                ('conference_starts_at', models.DateTimeField(blank=True, null=True)),
+                ('location_name', models.CharField(blank=True, max_length=100)),
+                ('status', models.CharField(choices=[('applied', 'Lottery Entry'), ('pending', 'Pending Approval'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('priority', models.CharField(choices=[('low', 'Low Priority'), ('medium', 'Medium Priority'), ('high', 'High Priority'), ('critical', 'Critical')], default='medium', max_length=20)),
+                ('booking_date', models.DateTimeField()),
+                ('justification', models.TextField(blank=True)),
+                ('notes', models.TextField(blank=True)),
+                ('approved_date', models.DateTimeField(blank=True, null=True)),
+                ('rejection_reason', models.TextField(blank=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('approved_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-booking_date'], name='archived_user_date_idx')],
+            },
+        ),
+    ]
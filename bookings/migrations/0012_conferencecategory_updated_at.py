@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0011_booking_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conferencecategory',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0012_conferencecategory_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conference',
+            name='deletion_requested_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -2,6 +2,7 @@
 
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.urls import reverse
 from django.utils import timezone
 
@@ -9,6 +10,7 @@ from django.utils import timezone
 class Location(models.Model):
     name = models.CharField(max_length=100, unique=True)
     address = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -16,6 +18,7 @@ class Location(models.Model):
 class ConferenceCategory(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name_plural = "Conference Categories"
@@ -30,19 +33,68 @@ class Conference(models.Model):
         ('high', 'High Priority'),
         ('critical', 'Critical'),
     ]
+    ALLOCATION_CHOICES = [
+        ('first_come', 'First come, first served'),
+        ('lottery', 'Lottery after applications close'),
+    ]
+    WEIGHTING_CHOICES = [
+        ('uniform', 'Equal chance for everyone'),
+        ('priority', 'Weighted by booking priority'),
+        ('first_timers', 'Favour people who attended less'),
+    ]
     
     title = models.CharField(max_length=200)
     description = models.TextField()
     location = models.ForeignKey(Location, on_delete=models.CASCADE, null=True, blank=True)
     capacity = models.PositiveIntegerField()
+    starts_at = models.DateTimeField(null=True, blank=True)
+    ends_at = models.DateTimeField(null=True, blank=True)
     requires_approval = models.BooleanField(default=True)
+    allocation_mode = models.CharField(max_length=20, choices=ALLOCATION_CHOICES, default='first_come')
+    applications_close_at = models.DateTimeField(null=True, blank=True)
+    lottery_weighting = models.CharField(max_length=20, choices=WEIGHTING_CHOICES, default='uniform')
+    # Set once the lottery has run; the seed makes the draw reproducible
+    allocated_at = models.DateTimeField(null=True, blank=True)
+    allocation_seed = models.BigIntegerField(null=True, blank=True)
+    # Set when deletion is queued; the conference is hidden and closed to
+    # bookings until the delete_conference job removes it
+    deletion_requested_at = models.DateTimeField(null=True, blank=True)
     image = models.ImageField(upload_to='conferences/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped on edit and whenever one of the conference's bookings changes
+    updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     
+    class Meta:
+        indexes = [
+            # Room conflict checks seek the latest conference starting before a time
+            models.Index(fields=['location', 'starts_at'], name='conference_room_slot_idx'),
+        ]
+    
     def __str__(self):
         return self.title
     
+    def clean(self):
+        """Require a complete, positive time slot that doesn't double-book the room"""
+        from .conflicts import room_conflict
+
+        if self.allocation_mode == 'lottery' and self.applications_close_at is None:
+            raise ValidationError({'applications_close_at': 'Lottery conferences need a closing date for applications.'})
+        if (self.starts_at is None) != (self.ends_at is None):
+            raise ValidationError('Give both a start and an end time, or neither.')
+        if self.starts_at is None:
+            return
+        if self.ends_at <= self.starts_at:
+            raise ValidationError({'ends_at': 'The conference must end after it starts.'})
+        if self.location_id:
+            clash = room_conflict(self.location_id, self.starts_at, self.ends_at, exclude_pk=self.pk)
+            if clash:
+                raise ValidationError(
+                    f'{self.location} is already booked for "{clash.title}" '
+                    f'from {timezone.localtime(clash.starts_at):%b %d %H:%M} '
+                    f'to {timezone.localtime(clash.ends_at):%b %d %H:%M}.'
+                )
+    
     def get_absolute_url(self):
         return reverse('conference_detail', args=[str(self.id)])
     
@@ -54,6 +106,17 @@ class Conference(models.Model):
         ).count()
         return self.capacity - booked
     
+    def has_ended(self):
+        return self.ends_at is not None and self.ends_at <= timezone.now()
+    
+    def applications_open(self):
+        """Whether a lottery conference is still collecting applications"""
+        return (
+            self.allocation_mode == 'lottery'
+            and self.allocated_at is None
+            and timezone.now() < self.applications_close_at
+        )
+    
     # def total_cost(self):
     #     """Calculate total cost of approved bookings"""
     #     return Booking.objects.filter(
@@ -63,6 +126,7 @@ class Conference(models.Model):
 
 class Booking(models.Model):
     STATUS_CHOICES = [
+        ('applied', 'Lottery Entry'),
         ('pending', 'Pending Approval'),
         ('approved', 'Approved'),
         ('rejected', 'Rejected'),
@@ -87,9 +151,20 @@ class Booking(models.Model):
     )
     approved_date = models.DateTimeField(null=True, blank=True)
     rejection_reason = models.TextField(blank=True)
+    priority = models.CharField(max_length=20, choices=Conference.PRIORITY_CHOICES, default='medium')
     
     class Meta:
         unique_together = ('user', 'conference')
+        indexes = [
+            # Newest-first listings and the admin date hierarchy
+            models.Index(fields=['booking_date'], name='booking_date_idx'),
+            # Approval queue: only pending rows, in age order
+            models.Index(
+                fields=['booking_date', 'id'],
+                condition=models.Q(status='pending'),
+                name='booking_pending_queue_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.conference.title}"
@@ -97,9 +172,128 @@ class Booking(models.Model):
     def get_status_display_color(self):
         """Return CSS color class for status"""
         status_colors = {
+            'applied': 'info',
             'pending': 'warning',
             'approved': 'success',
             'rejected': 'danger',
             'cancelled': 'secondary',
         }
-        return status_colors.get(self.status, 'secondary')
\ No newline at end of file
+        return status_colors.get(self.status, 'secondary')
+
+class TeamMembership(models.Model):
+    """Maps a manager to the employees whose bookings they approve"""
+    manager = models.ForeignKey(User, on_delete=models.CASCADE, related_name='managed_memberships')
+    member = models.ForeignKey(User, on_delete=models.CASCADE, related_name='team_memberships')
+
+    class Meta:
+        unique_together = ('manager', 'member')
+
+    def __str__(self):
+        return f"{self.manager.username} manages {self.member.username}"
+
+
+class Job(models.Model):
+    """A unit of background work, picked up by the run_jobs worker"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Percent complete")
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Worker polling: only queued jobs, in the order they may run
+            models.Index(
+                fields=['run_after', 'id'],
+                condition=models.Q(status='queued'),
+                name='job_queued_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    def set_progress(self, progress, message=''):
+        """Record progress with a single-row UPDATE, safe to call often"""
+        self.progress = max(0, min(100, int(progress)))
+        self.message = message[:255]
+        Job.objects.filter(pk=self.pk).update(progress=self.progress, message=self.message)
+
+    @property
+    def label(self):
+        return self.kind.replace('_', ' ').capitalize()
+
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
+
+
+class ArchivedBooking(models.Model):
+    """
+    A booking for a long-past conference, moved out of the Booking table by
+    the archive_bookings command. Conference details are copied in, so
+    rows stay readable if the conference is later deleted.
+    """
+    original_id = models.PositiveIntegerField(unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_bookings')
+    conference_id = models.PositiveIntegerField(db_index=True)
+    conference_title = models.CharField(max_length=200)
+    conference_starts_at = models.DateTimeField(null=True, blank=True)
+    location_name = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    priority = models.CharField(max_length=20, choices=Conference.PRIORITY_CHOICES, default='medium')
+    booking_date = models.DateTimeField()
+    justification = models.TextField(blank=True)
+    notes = models.TextField(blank=True)
+    approved_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    approved_date = models.DateTimeField(null=True, blank=True)
+    rejection_reason = models.TextField(blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # my_bookings?archived=1, newest first
+            models.Index(fields=['user', '-booking_date'], name='archived_user_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.conference_title} (archived)"
+
+    get_status_display_color = Booking.get_status_display_color
+
+
+class BookingRollup(models.Model):
+    """Booking counts per conference, kept for conferences whose bookings were archived"""
+    conference_id = models.PositiveIntegerField(unique=True)
+    conference_title = models.CharField(max_length=200)
+    location_name = models.CharField(max_length=100, blank=True)
+    starts_at = models.DateTimeField(null=True, blank=True)
+    capacity = models.PositiveIntegerField()
+    total = models.PositiveIntegerField(default=0)
+    applied = models.PositiveIntegerField(default=0)
+    pending = models.PositiveIntegerField(default=0)
+    approved = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    cancelled = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.conference_title}: {self.total} bookings"
@@ -0,0 +1,181 @@
+# bookings/profiling.py
+"""
+Per-request profiling and a guard against views that load whole tables.
+
+Profile collects, for the code run inside it:
+  - the tracemalloc peak,
+  - model instances created, per model (via post_init),
+  - queries run, per call site in project code (via execute_wrapper),
+    unless track_queries is false.
+
+ProfilingMiddleware wraps requests in a Profile when settings.BOOKINGS_PROFILING
+is true, or for staff (or in DEBUG) sending ``X-Profile: 1``, and reports
+through X-Profile-* response headers and the ``bookings.profiling`` logger.
+
+In tests, ``with instance_limit(100): client.get(...)`` or
+settings.BOOKINGS_MAX_INSTANCES_PER_REQUEST makes a view that builds more
+instances fail with InstanceLimitExceeded at the offending line.
+"""
+import logging
+import os
+import sysconfig
+import threading
+import traceback
+import tracemalloc
+from collections import Counter
+
+import django
+from django.conf import settings
+from django.db import connections
+from django.db.models.signals import post_init
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+
+
+# Frames under these paths are never reported as a query's call site
+LIBRARY_PATHS = tuple({
+    sysconfig.get_paths()['stdlib'],
+    sysconfig.get_paths()['purelib'],
+    os.path.dirname(django.__file__),
+})
+
+
+class InstanceLimitExceeded(Exception):
+    pass
+
+
+def _call_site(stack):
+    """Innermost frame outside Django, the standard library, installed packages and this module"""
+    root = str(settings.BASE_DIR)
+    for frame in reversed(stack):
+        filename = frame.filename
+        if filename == __file__ or filename.startswith(LIBRARY_PATHS) or 'site-packages' in filename:
+            continue
+        if filename.startswith(root):
+            filename = os.path.relpath(filename, root)
+        return f'{filename}:{frame.lineno} in {frame.name}'
+    return '<unknown>'
+
+
+class Profile:
+    """Context manager recording memory, instances and queries for the current thread"""
+
+    def __init__(self, limit=None, trace_memory=True, track_queries=True):
+        self.limit = limit
+        self.trace_memory = trace_memory
+        self.track_queries = track_queries
+        self.instances = Counter()
+        self.query_sites = Counter()
+        self.peak_memory = None
+        self._thread = None
+        self._wrappers = []
+        self._started_tracing = False
+
+    @property
+    def instance_count(self):
+        return sum(self.instances.values())
+
+    @property
+    def query_count(self):
+        return sum(self.query_sites.values())
+
+    def _on_init(self, sender, **kwargs):
+        # post_init is process-wide; only count instances built by our thread
+        if threading.get_ident() != self._thread:
+            return
+        self.instances[sender._meta.label] += 1
+        if self.limit is not None and self.instance_count > self.limit:
+            raise InstanceLimitExceeded(
+                f'More than {self.limit} model instances loaded ({dict(self.instances)})'
+            )
+
+    def _on_query(self, execute, sql, params, many, context):
+        self.query_sites[_call_site(traceback.extract_stack())] += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._thread = threading.get_ident()
+        post_init.connect(self._on_init, weak=False, dispatch_uid=id(self))
+        # Finding a query's call site walks the stack, so only do it when asked
+        if self.track_queries:
+            for alias in connections:
+                wrapper = connections[alias].execute_wrapper(self._on_query)
+                wrapper.__enter__()
+                self._wrappers.append(wrapper)
+        if self.trace_memory:
+            # tracemalloc is process-wide, so concurrent profiled requests share a peak
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.trace_memory:
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            if self._started_tracing:
+                tracemalloc.stop()
+        for wrapper in reversed(self._wrappers):
+            wrapper.__exit__(*exc_info)
+        self._wrappers = []
+        post_init.disconnect(dispatch_uid=id(self))
+        return False
+
+    def report(self):
+        return {
+            'peak_memory': self.peak_memory,
+            'instances': dict(self.instances.most_common()),
+            'queries': self.query_count,
+            'query_sites': dict(self.query_sites.most_common()),
+        }
+
+
+def instance_limit(limit):
+    """Fail as soon as more than ``limit`` model instances are built"""
+    return Profile(limit=limit, trace_memory=False, track_queries=False)
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests on demand. Must come after AuthenticationMiddleware.
+    Streaming bodies are produced after the middleware returns, so work
+    done while streaming is not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def enabled(self, request):
+        if getattr(settings, 'BOOKINGS_PROFILING', False):
+            return True
+        if request.META.get(PROFILE_HEADER) != '1':
+            return False
+        return settings.DEBUG or request.user.is_staff
+
+    def __call__(self, request):
+        limit = getattr(settings, 'BOOKINGS_MAX_INSTANCES_PER_REQUEST', None)
+        if not self.enabled(request):
+            if limit is None:
+                return self.get_response(request)
+            with instance_limit(limit):
+                return self.get_response(request)
+
+        with Profile(limit=limit) as profile:
+            response = self.get_response(request)
+        request.profile = profile
+
+        response['X-Profile-Peak-Memory'] = str(profile.peak_memory)
+        response['X-Profile-Instances'] = ', '.join(
+            f'{label}={count}' for label, count in profile.instances.most_common()
+        )
+        response['X-Profile-Queries'] = str(profile.query_count)
+        logger.info(
+            '%s %s: peak %.1f KiB, %d instances, %d queries\n  instances: %s\n  query sites:\n%s',
+            request.method, request.path, profile.peak_memory / 1024, profile.instance_count,
+            profile.query_count, dict(profile.instances.most_common()),
+            '\n'.join(f'    {count:>4}  {site}' for site, count in profile.query_sites.most_common()),
+        )
+        return response
@@ -0,0 +1,156 @@
+# bookings/ratelimit.py
+"""Rate limiting and admission control for the booking endpoints"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+# Sustained requests per second and burst size, per scope: at most
+# ``burst`` requests per ``burst / rate`` seconds. Override with
+# settings.BOOKINGS_RATE_LIMITS = {'book': {'rate': ..., 'burst': ...}}
+DEFAULT_RATE_LIMITS = {
+    'book': {'rate': 0.5, 'burst': 5},
+    'availability': {'rate': 2.0, 'burst': 20},
+    'api': {'rate': 5.0, 'burst': 50},
+}
+
+# Requests allowed to run at the same time against a single conference
+DEFAULT_ADMISSION_LIMIT = 20
+
+# Safety net so a crashed worker cannot leave a conference slot taken forever:
+# a request stops counting against the limit after one to two of these periods
+ADMISSION_SLOT_TIMEOUT = 30
+
+
+def get_rate_limit(scope):
+    limits = getattr(settings, 'BOOKINGS_RATE_LIMITS', {})
+    return {**DEFAULT_RATE_LIMITS[scope], **limits.get(scope, {})}
+
+
+def _incr(key, timeout):
+    """Atomically increment a counter, creating it if needed"""
+    cache.add(key, 0, timeout=timeout)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.add(key, 0, timeout=timeout)
+        return cache.incr(key)
+
+
+class SlidingWindow:
+    """
+    Sliding-window rate limiter built on the cache's atomic incr().
+
+    Each window of ``burst / rate`` seconds has its own counter; the count
+    used is this window's plus the previous window's, weighted by how much
+    of it still overlaps the last ``window`` seconds. Concurrent requests
+    each get a distinct count from incr(), so a stampede cannot all read
+    the same "not full yet" state. Refused requests are taken back out of
+    the counter, so retrying while limited doesn't extend the lockout.
+    """
+
+    def __init__(self, key, rate, burst):
+        self.key = key
+        self.burst = burst
+        self.window = burst / rate
+
+    def consume(self):
+        """Count one request, returning (allowed, seconds until allowed)"""
+        now = time.time()
+        index = int(now // self.window)
+        elapsed = now - index * self.window
+        timeout = math.ceil(self.window * 2) + 1
+
+        key = f'{self.key}:{index}'
+        current = _incr(key, timeout)
+        previous = cache.get(f'{self.key}:{index - 1}', 0)
+        overlap = 1 - elapsed / self.window
+        if previous * overlap + current <= self.burst:
+            return True, 0
+
+        try:
+            cache.decr(key)
+        except ValueError:  # Expired meanwhile
+            pass
+        return False, max(1, math.ceil(self._wait(previous, current - 1, elapsed)))
+
+    def _wait(self, previous, admitted, elapsed):
+        """Seconds until one more request fits, given the admitted counts"""
+        if admitted < self.burst:
+            # Later in this window, once enough of the previous one has slid out
+            return self.window * (1 - (self.burst - admitted - 1) / previous) - elapsed
+        # This window is full: early in the next one, once enough of it has slid out
+        return self.window - elapsed + self.window / self.burst
+
+
+def client_ip(request):
+    """Address of the connecting client; proxies must set REMOTE_ADDR correctly"""
+    return request.META.get('REMOTE_ADDR', 'unknown')
+
+
+def too_many_requests(retry_after, as_json=False):
+    """Fast 429 telling the client when to come back"""
+    message = f'Too many requests, try again in {retry_after} seconds.'
+    if as_json:
+        response = JsonResponse({'error': message, 'retry_after': retry_after}, status=429)
+    else:
+        response = HttpResponse(message, status=429, content_type='text/plain')
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limit(scope, as_json=False):
+    """Throttle a view with one limiter per user and one per client IP"""
+    def decorator(view_func):
+        @wraps(view_func)
+        def inner(request, *args, **kwargs):
+            limit = get_rate_limit(scope)
+            keys = [f'ratelimit:{scope}:ip:{client_ip(request)}']
+            if request.user.is_authenticated:
+                keys.append(f'ratelimit:{scope}:user:{request.user.pk}')
+
+            for key in keys:
+                allowed, retry_after = SlidingWindow(key, limit['rate'], limit['burst']).consume()
+                if not allowed:
+                    return too_many_requests(retry_after, as_json=as_json)
+            return view_func(request, *args, **kwargs)
+        return inner
+    return decorator
+
+
+def admission_control(methods=('POST',), as_json=False):
+    """
+    Bound the number of in-flight requests per conference (the ``pk`` URL
+    argument) and shed the excess straight away instead of queueing on the DB
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def inner(request, *args, **kwargs):
+            if request.method not in methods:
+                return view_func(request, *args, **kwargs)
+
+            limit = getattr(settings, 'BOOKINGS_ADMISSION_LIMIT', DEFAULT_ADMISSION_LIMIT)
+            # Requests check in on the counter of the current period and check
+            # out of that same counter. Counters live three periods, so one is
+            # never recreated while requests are still checking out of it,
+            # and a stuck request stops counting once its period is two back.
+            period = int(time.time() // ADMISSION_SLOT_TIMEOUT)
+            prefix = f'admission:conference:{kwargs.get("pk")}'
+            key = f'{prefix}:{period}'
+            in_flight = _incr(key, ADMISSION_SLOT_TIMEOUT * 3) + cache.get(f'{prefix}:{period - 1}', 0)
+
+            try:
+                if in_flight > limit:
+                    return too_many_requests(1, as_json=as_json)
+                return view_func(request, *args, **kwargs)
+            finally:
+                try:
+                    cache.decr(key)
+                except ValueError:
+                    pass
+        return inner
+    return decorator
@@ -0,0 +1,59 @@
+# bookings/signals.py
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Conference, Booking, Location
+
+
+def touch_conferences(conference_ids):
+    """
+    Bump conference timestamps so cached pages and ETags go stale. Bulk
+    operations that bypass save() (update(), bulk_update()) must call this.
+    ``conference_ids`` may be a list or a values('conference_id') subquery.
+    """
+    # update() skips save() and its signals, keeping this to a single UPDATE
+    Conference.objects.filter(pk__in=conference_ids).update(updated_at=timezone.now())
+
+
+_deferred = threading.local()
+
+
+@contextmanager
+def deferred_touches():
+    """
+    Collect the conferences touched by booking signals inside the block and
+    bump each of them once on exit, instead of one UPDATE per booking
+    """
+    if getattr(_deferred, 'conference_ids', None) is not None:
+        # Nested: the outermost block does the touching
+        yield
+        return
+    _deferred.conference_ids = set()
+    try:
+        yield
+    finally:
+        conference_ids, _deferred.conference_ids = _deferred.conference_ids, None
+        if conference_ids:
+            touch_conferences(list(conference_ids))
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def touch_conference_on_booking_change(sender, instance, **kwargs):
+    """Bump the conference timestamp whenever one of its bookings changes"""
+    pending = getattr(_deferred, 'conference_ids', None)
+    if pending is not None:
+        pending.add(instance.conference_id)
+    else:
+        touch_conferences([instance.conference_id])
+
+
+@receiver(post_delete, sender=Conference)
+def touch_location_on_conference_delete(sender, instance, **kwargs):
+    """A removed conference must still move the home page Last-Modified forward"""
+    if instance.location_id:
+        Location.objects.filter(pk=instance.location_id).update(updated_at=timezone.now())
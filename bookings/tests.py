@@ -1,3 +1,1164 @@
-from django.test import TestCase
 
-# Create your tests here.
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock, skipIf
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.db import DatabaseError, connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import analytics, api, jobs
+from .archive import archivable_conferences, archive_conference, archive_cutoff
+from .caching import get_available_seats, prime_availability
+from .conflicts import Conflict, room_conflict, sweep, user_conflict
+from .ical import user_feed_token
+from .lottery import CLASH_REASON, AllocationError, allocate, application_weights, draw
+from .profiling import InstanceLimitExceeded, Profile, instance_limit
+from .models import (
+    ArchivedBooking, Booking, BookingRollup, Conference, ConferenceCategory, Job, Location, TeamMembership,
+)
+from .ratelimit import ADMISSION_SLOT_TIMEOUT, SlidingWindow, admission_control
+from .warmup import warm_process
+
+
+def make_user(username='alice', **extra):
+    return User.objects.create_user(username=username, password='secret', **extra)
+
+
+def make_conference(created_by, title='PyCon', **extra):
+    extra.setdefault('description', 'A conference')
+    extra.setdefault('capacity', 10)
+    return Conference.objects.create(title=title, created_by=created_by, **extra)
+
+
+class BookingsTestCase(TestCase):
+    """Caches hold conditional-request state and rate-limit buckets, so start each test empty"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+
+# Conditional responses (home and conference pages)
+
+class ConditionalPageTests(BookingsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin')
+        self.location = Location.objects.create(name='HQ')
+        self.conference = make_conference(self.admin, location=self.location)
+        self.category = ConferenceCategory.objects.create(name='Python')
+
+    def test_anonymous_home_is_publicly_cacheable(self):
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=60', response['Cache-Control'])
+
+    def test_home_revalidates_with_304(self):
+        etag = self.client.get(reverse('home'))['ETag']
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_authenticated_home_is_private(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('home'))
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_category_rename_changes_home_etag(self):
+        etag = self.client.get(reverse('home'))['ETag']
+        self.category.name = 'Data'
+        self.category.save()
+        response = self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Data')
+
+    def test_new_category_changes_home_etag(self):
+        etag = self.client.get(reverse('home'))['ETag']
+        ConferenceCategory.objects.create(name='Rust')
+        response = self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_booking_invalidates_conference_page(self):
+        url = reverse('conference_detail', args=[self.conference.pk])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Booking.objects.create(user=make_user('bob'), conference=self.conference)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_closing_applications_changes_the_page(self):
+        close_at = timezone.now() + timedelta(seconds=30)
+        Conference.objects.filter(pk=self.conference.pk).update(
+            allocation_mode='lottery', applications_close_at=close_at,
+        )
+        url = reverse('conference_detail', args=[self.conference.pk])
+        self.client.force_login(make_user('bob'))
+        response = self.client.get(url)
+        self.assertContains(response, 'Enter Lottery')
+
+        with mock.patch('django.utils.timezone.now', return_value=close_at + timedelta(seconds=1)):
+            revalidated = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag'], HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+            )
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertContains(revalidated, 'Applications Closed')
+
+    def test_ending_changes_the_page(self):
+        ends_at = timezone.now() + timedelta(seconds=30)
+        Conference.objects.filter(pk=self.conference.pk).update(starts_at=ends_at - timedelta(hours=1), ends_at=ends_at)
+        url = reverse('conference_detail', args=[self.conference.pk])
+        self.client.force_login(make_user('bob'))
+        etag = self.client.get(url)['ETag']
+        with mock.patch('django.utils.timezone.now', return_value=ends_at):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'This Conference Has Ended')
+
+    def test_public_max_age_stops_at_the_next_transition(self):
+        Conference.objects.filter(pk=self.conference.pk).update(
+            allocation_mode='lottery', applications_close_at=timezone.now() + timedelta(seconds=20),
+        )
+        response = self.client.get(reverse('conference_detail', args=[self.conference.pk]))
+        max_age = int(response['Cache-Control'].split('max-age=')[1].split(',')[0])
+        self.assertLessEqual(max_age, 20)
+
+
+# Process warmup
+
+class WarmupTests(BookingsTestCase):
+    def test_warm_process_survives_an_unavailable_database(self):
+        with mock.patch('bookings.warmup.get_conference_listing', side_effect=DatabaseError('no such table')):
+            with self.assertLogs('bookings.warmup', 'WARNING') as logs:
+                warm_process()
+        self.assertIn('database unavailable', logs.output[0])
+
+    def test_primed_availability_is_read_without_queries(self):
+        user = make_user()
+        conferences = [make_conference(user, title=f'C{n}', capacity=5) for n in range(3)]
+        Booking.objects.create(user=user, conference=conferences[0], status='approved')
+        Booking.objects.create(user=make_user('bob'), conference=conferences[0], status='cancelled')
+        conferences = list(Conference.objects.order_by('pk'))
+
+        self.assertEqual(prime_availability(), 3)
+        with self.assertNumQueries(0):
+            seats = [get_available_seats(conference) for conference in conferences]
+        self.assertEqual(seats, [4, 5, 5])
+
+    def test_command_can_skip_the_database(self):
+        out = StringIO()
+        with self.assertNumQueries(0):
+            call_command('warmup', skip_caches=True, stdout=out)
+        self.assertIn('Warmup complete.', out.getvalue())
+        self.assertNotIn('availabilities', out.getvalue())
+
+    def test_command_primes_the_caches(self):
+        make_conference(make_user())
+        out = StringIO()
+        call_command('warmup', stdout=out)
+        self.assertIn('1 conference availabilities cached', out.getvalue())
+
+
+# Rate limiting and admission control
+
+@override_settings(BOOKINGS_RATE_LIMITS={
+    'book': {'rate': 0.1, 'burst': 2},
+    'availability': {'rate': 0.1, 'burst': 2},
+})
+class RateLimitTests(BookingsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.conference = make_conference(self.user)
+        self.client.force_login(self.user)
+
+    def test_book_page_returns_429_with_retry_after(self):
+        url = reverse('book_conference', args=[self.conference.pk])
+        for _ in range(2):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+
+    def test_api_429_is_json(self):
+        url = reverse('api_conference_availability', args=[self.conference.pk])
+        for _ in range(2):
+            self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('retry_after', response.json())
+
+    def test_limits_are_per_user(self):
+        url = reverse('book_conference', args=[self.conference.pk])
+        for _ in range(3):
+            self.client.get(url)
+        other = make_user('bob')
+        self.client.force_login(other)
+        # Same IP, so the shared per-IP limit still applies
+        self.assertEqual(self.client.get(url).status_code, 429)
+        cache.clear()
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_concurrent_requests_cannot_overdraw(self):
+        limiter_args = ('ratelimit:test', 0.01, 5)
+        barrier = threading.Barrier(20)
+        results = []
+
+        def hit():
+            barrier.wait()
+            results.append(SlidingWindow(*limiter_args).consume()[0])
+
+        threads = [threading.Thread(target=hit) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 5)
+
+    def test_previous_window_counts_towards_the_limit(self):
+        limiter = SlidingWindow('ratelimit:slide', rate=1, burst=4)
+        with mock.patch('bookings.ratelimit.time.time', return_value=1000.0):
+            for _ in range(4):
+                self.assertTrue(limiter.consume()[0])
+        # An eighth into the next window 7/8 of the old traffic still counts
+        with mock.patch('bookings.ratelimit.time.time', return_value=1004.5):
+            allowed, retry_after = limiter.consume()
+        self.assertFalse(allowed)
+        self.assertGreaterEqual(retry_after, 1)
+
+    def test_client_obeying_retry_after_is_admitted(self):
+        clock = mock.patch('bookings.ratelimit.time.time', return_value=1000.0)
+        limiter = SlidingWindow('ratelimit:retry', rate=0.5, burst=5)
+        with clock as now:
+            results = [limiter.consume() for _ in range(20)]
+            self.assertEqual([allowed for allowed, _ in results].count(True), 5)
+            # Hammering while limited doesn't push the answer further out
+            retry_after = results[-1][1]
+            self.assertEqual(retry_after, results[5][1])
+
+            now.return_value += retry_after
+            self.assertEqual(limiter.consume(), (True, 0))
+
+    def test_retry_after_inside_the_window(self):
+        clock = mock.patch('bookings.ratelimit.time.time', return_value=1000.0)
+        limiter = SlidingWindow('ratelimit:slide-retry', rate=0.5, burst=5)
+        with clock as now:
+            for _ in range(5):
+                limiter.consume()
+            # A fifth into the next window only one more fits
+            now.return_value = 1012.0
+            self.assertTrue(limiter.consume()[0])
+            allowed, retry_after = limiter.consume()
+            self.assertEqual((allowed, retry_after), (False, 2))
+
+            now.return_value += retry_after
+            self.assertTrue(limiter.consume()[0])
+
+
+
+@override_settings(BOOKINGS_ADMISSION_LIMIT=1)
+class AdmissionControlTests(BookingsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = RequestFactory()
+        self.nested_status = None
+
+        @admission_control()
+        def view(request, pk):
+            if request.POST.get('nested'):
+                nested = self.factory.post('/', {})
+                self.nested_status = view(nested, pk=pk).status_code
+            return HttpResponse('ok')
+
+        self.view = view
+
+    def test_sheds_requests_over_the_limit(self):
+        response = self.view(self.factory.post('/', {'nested': '1'}), pk=1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.nested_status, 429)
+
+    def test_slot_is_released_after_the_request(self):
+        self.view(self.factory.post('/'), pk=1)
+        self.assertEqual(self.view(self.factory.post('/'), pk=1).status_code, 200)
+
+    def test_limits_are_per_conference(self):
+        @admission_control()
+        def outer(request, pk):
+            return self.view(self.factory.post('/'), pk=2)
+
+        self.assertEqual(outer(self.factory.post('/'), pk=1).status_code, 200)
+
+    def test_get_requests_are_not_gated(self):
+        response = self.view(self.factory.get('/', {'nested': '1'}), pk=1)
+        self.assertEqual(response.status_code, 200)
+
+    def test_counter_never_goes_negative_across_periods(self):
+        start = 10000 * ADMISSION_SLOT_TIMEOUT
+        clock = mock.patch('bookings.ratelimit.time.time', return_value=start)
+        with clock as now:
+            @admission_control()
+            def slow(request, pk):
+                # The request outlives its period before checking out
+                now.return_value = start + ADMISSION_SLOT_TIMEOUT * 2
+                return HttpResponse('ok')
+
+            slow(self.factory.post('/'), pk=1)
+            self.view(self.factory.post('/', {'nested': '1'}), pk=1)
+        self.assertEqual(self.nested_status, 429)
+
+
+# Capacity forecasting
+
+@skipIf(analytics.np is None, 'numpy is not installed')
+class ConferenceMetricsTests(BookingsTestCase):
+    def history(self, capacity, bookings):
+        """One conference created at t=0; bookings are (status, seconds) pairs"""
+        np = analytics.np
+        codes = analytics.STATUS_CODES
+        return {
+            'conference_id': np.array([1]),
+            'conference_location': np.array([1]),
+            'conference_capacity': np.array([capacity]),
+            'conference_created': np.array([0.0]),
+            'booking_conference': np.array([1] * len(bookings)),
+            'booking_status': np.array([codes[status] for status, _ in bookings], dtype=np.int8),
+            'booking_time': np.array([float(at) for _, at in bookings]),
+        }
+
+    def test_sellout_is_the_booking_that_took_the_last_seat(self):
+        metrics = analytics.conference_metrics(self.history(2, [('approved', 10), ('pending', 20)]))
+        self.assertEqual(metrics['time_to_sellout'][0], 20)
+        self.assertEqual(metrics['fill_rate'][0], 1)
+
+    def test_released_seats_do_not_count_towards_sellout(self):
+        history = self.history(2, [
+            ('cancelled', 5), ('rejected', 10), ('approved', 20), ('pending', 30), ('approved', 40),
+        ])
+        metrics = analytics.conference_metrics(history)
+        self.assertEqual(metrics['time_to_sellout'][0], 30)
+        self.assertEqual(metrics['demand'][0], 5)
+
+    def test_conference_with_free_seats_never_sold_out(self):
+        history = self.history(3, [('approved', 10), ('cancelled', 20), ('rejected', 30)])
+        metrics = analytics.conference_metrics(history)
+        self.assertTrue(analytics.np.isnan(metrics['time_to_sellout'][0]))
+
+    def test_bookings_outside_the_snapshot_are_ignored(self):
+        history = self.history(1, [('approved', 10)])
+        np = analytics.np
+        # A conference created (and booked) while the history was loading
+        history['booking_conference'] = np.array([1, 2, 0])
+        history['booking_status'] = np.array([1, 1, 1], dtype=np.int8)
+        history['booking_time'] = np.array([10.0, 20.0, 30.0])
+        metrics = analytics.conference_metrics(history)
+        self.assertEqual(list(metrics['demand']), [1])
+        self.assertEqual(metrics['time_to_sellout'][0], 10)
+
+    def test_empty_snapshot(self):
+        history = self.history(1, [('approved', 10)])
+        history['conference_id'] = history['conference_id'][:0]
+        history['conference_capacity'] = history['conference_capacity'][:0]
+        history['conference_created'] = history['conference_created'][:0]
+        history['conference_location'] = history['conference_location'][:0]
+        self.assertEqual(len(analytics.conference_metrics(history)['demand']), 0)
+
+    def test_epoch_seconds_from_every_driver_format(self):
+        naive = datetime(2024, 1, 1, 12, 0, 0, 500000)
+        expected = naive.replace(tzinfo=dt_timezone.utc).timestamp()
+        for values in ([naive.isoformat(sep=' ')], [naive], [naive.replace(tzinfo=dt_timezone.utc)]):
+            with self.subTest(values=values):
+                self.assertEqual(list(analytics._to_epoch_seconds(values)), [expected])
+
+    def test_load_history_reads_bookings(self):
+        user = make_user()
+        conference = make_conference(user)
+        Booking.objects.create(user=user, conference=conference, status='approved')
+        history = analytics.load_history()
+        self.assertEqual(list(history['booking_conference']), [conference.pk])
+        self.assertEqual(list(history['booking_status']), [analytics.STATUS_CODES['approved']])
+        booked = Booking.objects.get().booking_date.timestamp()
+        self.assertAlmostEqual(history['booking_time'][0], booked, places=3)
+
+
+# Background jobs
+
+class JobQueueTests(BookingsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+        handlers = mock.patch.dict(jobs.HANDLERS, {'flaky': self.flaky})
+        handlers.start()
+        self.addCleanup(handlers.stop)
+
+    def flaky(self, job):
+        self.calls.append(job.attempts)
+        if job.payload.get('fail'):
+            raise RuntimeError('boom')
+        return {'ok': True}
+
+    def test_enqueue_rejects_unknown_kinds(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue('no_such_job')
+
+    def test_claim_next_takes_jobs_in_order_once(self):
+        first = jobs.enqueue('flaky')
+        second = jobs.enqueue('flaky')
+        later = jobs.enqueue('flaky')
+        Job.objects.filter(pk=later.pk).update(run_after=timezone.now() + timedelta(hours=1))
+
+        claimed = jobs.claim_next()
+        self.assertEqual((claimed.pk, claimed.status, claimed.attempts), (first.pk, 'running', 1))
+        self.assertEqual(jobs.claim_next().pk, second.pk)
+        self.assertIsNone(jobs.claim_next())
+
+    def test_successful_job_records_its_result(self):
+        job = jobs.enqueue('flaky')
+        self.assertTrue(jobs.run_job(jobs.claim_next()))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress, job.result), ('succeeded', 100, {'ok': True}))
+
+    def test_failed_job_is_retried_with_backoff(self):
+        job = jobs.enqueue('flaky', {'fail': True}, max_attempts=3)
+        for attempt in (1, 2):
+            before = timezone.now()
+            with self.assertLogs('bookings.jobs', 'ERROR'):
+                self.assertFalse(jobs.run_job(jobs.claim_next()))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ('queued', attempt))
+            self.assertIn('boom', job.error)
+            delay = jobs.RETRY_BASE_DELAY * 2 ** (attempt - 1)
+            self.assertGreaterEqual(job.run_after, before + timedelta(seconds=delay))
+            # Not runnable until the backoff has passed
+            self.assertIsNone(jobs.claim_next())
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+
+        with self.assertLogs('bookings.jobs', 'ERROR'):
+            self.assertFalse(jobs.run_job(jobs.claim_next()))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 3))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(self.calls, [1, 2, 3])
+
+    def test_requeue_stale_only_touches_old_running_jobs(self):
+        stale = jobs.enqueue('flaky')
+        fresh = jobs.enqueue('flaky')
+        Job.objects.filter(pk=stale.pk).update(
+            status='running', started_at=timezone.now() - jobs.STALE_AFTER - timedelta(minutes=1),
+        )
+        Job.objects.filter(pk=fresh.pk).update(status='running', started_at=timezone.now())
+
+        self.assertEqual(jobs.requeue_stale(), 1)
+        self.assertEqual(Job.objects.get(pk=stale.pk).status, 'queued')
+        self.assertEqual(Job.objects.get(pk=fresh.pk).status, 'running')
+
+    def test_unique_enqueue_returns_the_pending_job(self):
+        job = jobs.enqueue('flaky', {'id': 1})
+        self.assertEqual(jobs.enqueue('flaky', {'id': 1}, unique=True).pk, job.pk)
+        self.assertNotEqual(jobs.enqueue('flaky', {'id': 2}, unique=True).pk, job.pk)
+        Job.objects.filter(pk=job.pk).update(status='failed')
+        self.assertNotEqual(jobs.enqueue('flaky', {'id': 1}, unique=True).pk, job.pk)
+
+
+class DeleteConferenceTests(BookingsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin', is_superuser=True, is_staff=True)
+        self.conference = make_conference(self.admin, location=Location.objects.create(name='HQ'))
+        self.url = reverse('delete_conference', args=[self.conference.pk])
+        self.client.force_login(self.admin)
+
+    def test_delete_request_only_queues_a_job(self):
+        for n in range(3):
+            Booking.objects.create(user=make_user(f'user{n}'), conference=self.conference)
+        # Session, user, conference, mark as being deleted, insert the job
+        with self.assertNumQueries(5):
+            response = self.client.post(self.url)
+        job = Job.objects.get()
+        self.assertRedirects(response, reverse('job_status', args=[job.pk]), fetch_redirect_response=False)
+        self.assertEqual(Booking.objects.count(), 3)
+
+        self.assertTrue(jobs.run_job(jobs.claim_next()))
+        self.assertFalse(Conference.objects.exists())
+        self.assertFalse(Booking.objects.exists())
+        self.assertEqual(Job.objects.get().result, {'bookings_deleted': 3})
+
+    def test_second_request_reuses_the_queued_job(self):
+        self.client.post(self.url)
+        self.client.post(self.url)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_failed_deletion_lists_the_conference_again(self):
+        self.client.post(self.url)
+        Job.objects.update(max_attempts=1)
+        job = jobs.claim_next()
+        with mock.patch('bookings.jobs.Booking.objects.filter', side_effect=DatabaseError('locked')):
+            with self.assertLogs('bookings.jobs', 'ERROR'):
+                self.assertFalse(jobs.run_job(job))
+
+        self.assertEqual(Job.objects.get().status, 'failed')
+        self.conference.refresh_from_db()
+        self.assertIsNone(self.conference.deletion_requested_at)
+        detail_url = reverse('conference_detail', args=[self.conference.pk])
+        self.assertContains(self.client.get(reverse('home')), detail_url)
+
+    def test_reports_skip_forecasting_without_numpy(self):
+        with mock.patch('bookings.analytics.np', None):
+            response = self.client.get(reverse('reports'))
+        self.assertNotContains(response, 'Capacity Planning')
+        self.assertFalse(Job.objects.filter(kind='rebuild_capacity_forecast').exists())
+
+    @skipIf(analytics.np is None, 'numpy is not installed')
+    def test_reports_queue_one_forecast_rebuild(self):
+        self.client.get(reverse('reports'))
+        response = self.client.get(reverse('reports'))
+        self.assertContains(response, 'Capacity Planning')
+        self.assertEqual(Job.objects.filter(kind='rebuild_capacity_forecast').count(), 1)
+
+    def test_conference_is_hidden_and_closed_while_queued(self):
+        detail_url = reverse('conference_detail', args=[self.conference.pk])
+        self.assertContains(self.client.get(reverse('home')), detail_url)
+        self.client.post(self.url)
+        self.assertNotContains(self.client.get(reverse('home')), detail_url)
+
+        self.client.force_login(make_user('bob'))
+        response = self.client.post(reverse('book_conference', args=[self.conference.pk]))
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+        self.assertFalse(Booking.objects.exists())
+
+
+# Calendar feeds
+
+class UserCalendarFeedTests(BookingsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        start = timezone.now() + timedelta(days=30)
+        self.conference = make_conference(
+            self.user, location=Location.objects.create(name='HQ'),
+            starts_at=start, ends_at=start + timedelta(hours=8),
+        )
+        Booking.objects.create(
+            user=self.user, conference=self.conference, status='approved', approved_date=timezone.now(),
+        )
+        self.url = reverse('user_calendar_feed', args=[user_feed_token(self.user)])
+
+    def test_feed_lists_approved_bookings(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertContains(response, 'SUMMARY:PyCon')
+        self.assertContains(response, 'LOCATION:HQ')
+
+    def test_tampered_token_is_404(self):
+        response = self.client.get(reverse('user_calendar_feed', args=[user_feed_token(self.user) + 'x']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_cached_feed_costs_one_query(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'SUMMARY:PyCon')
+
+    def test_revalidates_with_304(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_other_peoples_bookings_keep_the_version(self):
+        etag = self.client.get(self.url)['ETag']
+        Booking.objects.create(user=make_user('bob'), conference=self.conference, status='approved')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_conference_edits_change_the_version(self):
+        etag = self.client.get(self.url)['ETag']
+        self.conference.title = 'DjangoCon'
+        self.conference.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'SUMMARY:DjangoCon')
+
+    def test_cancelling_changes_the_version(self):
+        etag = self.client.get(self.url)['ETag']
+        Booking.objects.filter(user=self.user).update(status='cancelled')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertNotContains(response, 'SUMMARY:PyCon')
+
+    def test_archived_bookings_stay_in_the_feeds(self):
+        long_ago = timezone.now() - timedelta(days=800)
+        past = make_conference(
+            self.user, title='PastCon', location=self.conference.location,
+            starts_at=long_ago, ends_at=long_ago + timedelta(hours=8),
+        )
+        Booking.objects.create(user=self.user, conference=past, status='approved')
+        etag = self.client.get(self.url)['ETag']
+
+        archive_conference(past.pk)
+        self.assertFalse(Booking.objects.filter(conference=past).exists())
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+        cache.clear()
+        body = self.client.get(self.url).content.decode()
+        self.assertIn('SUMMARY:PastCon', body)
+        self.assertIn('DESCRIPTION:A conference', body)
+        self.assertIn(f'DTEND:{(long_ago + timedelta(hours=8)).strftime("%Y%m%dT%H%M%SZ")}', body)
+
+        url = reverse('location_calendar_feed', args=[past.location_id])
+        self.assertIn('SUMMARY:PastCon', b''.join(self.client.get(url).streaming_content).decode())
+
+    def test_location_rename_changes_the_location_feed(self):
+        url = reverse('location_calendar_feed', args=[self.conference.location_id])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        location = self.conference.location
+        location.name = 'Main Office'
+        location.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('X-WR-CALNAME:Main Office', b''.join(response.streaming_content).decode())
+
+    def test_location_feed_lists_booked_conferences(self):
+        url = reverse('location_calendar_feed', args=[self.conference.location_id])
+        body = b''.join(self.client.get(url).streaming_content).decode()
+        self.assertIn('SUMMARY:PyCon', body)
+        self.assertIn('DTSTAMP:', body)
+
+
+# Scheduling conflicts
+
+class SweepTests(BookingsTestCase):
+    def test_finds_every_overlapping_pair_per_group(self):
+        intervals = [
+            ('a', 0, 10, 'x'), ('a', 5, 15, 'y'), ('a', 6, 7, 'z'), ('a', 15, 20, 'w'),
+            ('b', 0, 10, 'p'), ('b', 10, 20, 'q'),
+        ]
+        self.assertEqual(list(sweep(intervals)), [
+            Conflict('a', 'x', 'y', 5, 10),
+            Conflict('a', 'x', 'z', 6, 7),
+            Conflict('a', 'y', 'z', 6, 7),
+        ])
+
+    def test_groups_do_not_interact(self):
+        self.assertEqual(list(sweep([('a', 0, 10, 'x'), ('b', 5, 15, 'y')])), [])
+
+
+class ConflictTests(BookingsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.room = Location.objects.create(name='Hall A')
+        self.start = timezone.now() + timedelta(days=30)
+        self.keynote = self.schedule('Keynote', 0, 2)
+
+    def schedule(self, title, start_hours, end_hours, location=None):
+        return make_conference(
+            self.user, title=title, location=location or self.room,
+            starts_at=self.start + timedelta(hours=start_hours),
+            ends_at=self.start + timedelta(hours=end_hours),
+        )
+
+    def slot(self, start_hours, end_hours):
+        return self.start + timedelta(hours=start_hours), self.start + timedelta(hours=end_hours)
+
+    def test_room_conflict_finds_overlaps(self):
+        self.assertEqual(room_conflict(self.room.pk, *self.slot(1, 3)), self.keynote)
+        self.assertEqual(room_conflict(self.room.pk, *self.slot(-1, 1)), self.keynote)
+
+    def test_back_to_back_is_not_a_conflict(self):
+        self.assertIsNone(room_conflict(self.room.pk, *self.slot(2, 4)))
+        self.assertIsNone(room_conflict(self.room.pk, *self.slot(-2, 0)))
+
+    def test_conference_does_not_conflict_with_itself(self):
+        self.assertIsNone(room_conflict(self.room.pk, *self.slot(0, 2), exclude_pk=self.keynote.pk))
+
+    def test_conference_without_an_end_is_ignored(self):
+        # Older rows can have a start but no end; they must not break the check
+        make_conference(self.user, title='Legacy', location=self.room, starts_at=self.start + timedelta(hours=3))
+        self.assertIsNone(room_conflict(self.room.pk, *self.slot(4, 5)))
+        self.assertEqual(room_conflict(self.room.pk, *self.slot(1, 5)), self.keynote)
+
+    def test_clean_rejects_a_double_booked_room(self):
+        clash = Conference(
+            title='Workshop', description='x', capacity=5, created_by=self.user,
+            location=self.room, starts_at=self.start + timedelta(hours=1), ends_at=self.start + timedelta(hours=3),
+        )
+        with self.assertRaisesMessage(ValidationError, 'Keynote'):
+            clash.full_clean()
+
+    def test_user_conflict_finds_overlapping_bookings(self):
+        Booking.objects.create(user=self.user, conference=self.keynote, status='approved')
+        other_room = Location.objects.create(name='Hall B')
+        overlapping = self.schedule('Workshop', 1, 3, location=other_room)
+        later = self.schedule('Panel', 2, 3, location=other_room)
+
+        self.assertEqual(user_conflict(self.user, overlapping).conference, self.keynote)
+        self.assertIsNone(user_conflict(self.user, later))
+        self.assertIsNone(user_conflict(make_user('bob'), overlapping))
+
+        Booking.objects.filter(user=self.user).update(status='cancelled')
+        self.assertIsNone(user_conflict(self.user, overlapping))
+
+    def test_booking_an_overlapping_conference_is_refused(self):
+        Booking.objects.create(user=self.user, conference=self.keynote, status='approved')
+        workshop = self.schedule('Workshop', 1, 3, location=Location.objects.create(name='Hall B'))
+        self.client.force_login(self.user)
+
+        response = self.client.post(reverse('book_conference', args=[workshop.pk]))
+        self.assertRedirects(response, reverse('conference_detail', args=[workshop.pk]), fetch_redirect_response=False)
+        self.assertFalse(Booking.objects.filter(conference=workshop).exists())
+
+    def test_conflict_report_lists_legacy_overlaps(self):
+        # Saved without clean(), as rows from before the check were
+        self.schedule('Workshop', 1, 3)
+        out = StringIO()
+        call_command('conflict_report', rooms_only=True, stdout=out)
+        self.assertIn('"Keynote" and "Workshop" overlap', out.getvalue())
+
+
+# Lottery allocation
+
+class DrawTests(BookingsTestCase):
+    def test_same_seed_gives_the_same_winners(self):
+        applications = [(pk, 1.0) for pk in range(1, 101)]
+        winners = draw(applications, 10, seed=42)
+        self.assertEqual(len(winners), 10)
+        self.assertEqual(draw(list(reversed(applications)), 10, seed=42), winners)
+        self.assertNotEqual(draw(applications, 10, seed=43), winners)
+
+    def test_more_seats_than_applications(self):
+        self.assertEqual(sorted(draw([(1, 1.0), (2, 1.0)], 5, seed=1)), [1, 2])
+
+    def test_weights_skew_the_draw(self):
+        # Ids 1-50 weigh 4, ids 51-100 weigh 0.5; count wins over many seeds
+        applications = [(pk, 4.0 if pk <= 50 else 0.5) for pk in range(1, 101)]
+        heavy = sum(
+            sum(1 for pk in draw(applications, 10, seed=seed) if pk <= 50)
+            for seed in range(200)
+        )
+        self.assertGreater(heavy / 2000, 0.8)
+
+    def test_zero_weight_never_wins(self):
+        self.assertEqual(draw([(1, 0), (2, 1.0)], 2, seed=7), [2])
+
+
+class AllocateTests(BookingsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin')
+        self.conference = make_conference(
+            self.admin, capacity=2, allocation_mode='lottery', requires_approval=False,
+            applications_close_at=timezone.now() - timedelta(hours=1),
+        )
+        self.applicants = [make_user(f'user{n}') for n in range(5)]
+        for user in self.applicants:
+            Booking.objects.create(user=user, conference=self.conference, status='applied')
+
+    def test_allocate_draws_winners_and_rejects_the_rest(self):
+        allocation = allocate(self.conference, seed=1)
+        self.assertEqual((allocation.applications, allocation.seats), (5, 2))
+        statuses = dict(Booking.objects.values_list('pk', 'status'))
+        self.assertEqual(sorted(pk for pk, status in statuses.items() if status == 'approved'), sorted(allocation.winners))
+        self.assertEqual(list(statuses.values()).count('rejected'), 3)
+        self.conference.refresh_from_db()
+        self.assertEqual(self.conference.allocation_seed, 1)
+
+    def test_dry_run_is_replayed_by_the_real_run(self):
+        planned = allocate(self.conference, seed=5, dry_run=True)
+        self.assertFalse(Booking.objects.exclude(status='applied').exists())
+        self.assertEqual(allocate(self.conference, seed=5).winners, planned.winners)
+
+    def test_allocate_refuses_to_run_twice(self):
+        allocate(self.conference, seed=1)
+        with self.assertRaisesMessage(AllocationError, 'already allocated'):
+            allocate(self.conference, seed=2)
+        # A stale copy that missed the first run is stopped by the claim
+        stale = Conference.objects.get(pk=self.conference.pk)
+        stale.allocated_at = None
+        with self.assertRaisesMessage(AllocationError, 'already allocated'):
+            allocate(stale, seed=2)
+
+    def test_allocate_refuses_while_applications_are_open(self):
+        Conference.objects.filter(pk=self.conference.pk).update(
+            applications_close_at=timezone.now() + timedelta(hours=1),
+        )
+        self.conference.refresh_from_db()
+        with self.assertRaises(AllocationError):
+            allocate(self.conference)
+
+    def test_winner_of_an_overlapping_lottery_is_left_out(self):
+        start = timezone.now() + timedelta(days=30)
+        slot = {'starts_at': start, 'ends_at': start + timedelta(hours=8)}
+        Conference.objects.filter(pk=self.conference.pk).update(capacity=10, **slot)
+        self.conference.refresh_from_db()
+        other = make_conference(
+            self.admin, title='Same day', capacity=10, allocation_mode='lottery', requires_approval=False,
+            applications_close_at=timezone.now() - timedelta(hours=1), **slot,
+        )
+        Booking.objects.create(user=self.applicants[0], conference=other, status='applied')
+
+        allocate(other, seed=1)
+        allocation = allocate(self.conference, seed=1)
+        clashing = Booking.objects.get(user=self.applicants[0], conference=self.conference)
+        self.assertEqual(allocation.clashing, [clashing.pk])
+        self.assertNotIn(clashing.pk, allocation.winners)
+        self.assertEqual((clashing.status, clashing.rejection_reason), ('rejected', CLASH_REASON))
+        self.assertEqual(len(allocation.winners), 4)
+
+    def test_priority_weighting_uses_booking_priority(self):
+        Conference.objects.filter(pk=self.conference.pk).update(lottery_weighting='priority')
+        self.conference.refresh_from_db()
+        Booking.objects.filter(user=self.applicants[0]).update(priority='critical')
+        weights = dict(application_weights(self.conference))
+        self.assertEqual(sorted(weights.values()), [1.0, 1.0, 1.0, 1.0, 4.0])
+
+
+class BookingPriorityTests(BookingsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manager = make_user('manager')
+        self.member = make_user('member')
+        TeamMembership.objects.create(manager=self.manager, member=self.member)
+        self.conference = make_conference(self.manager)
+
+    def test_applicant_chooses_a_priority(self):
+        self.client.force_login(self.member)
+        self.client.post(reverse('book_conference', args=[self.conference.pk]), {
+            'justification': 'Talk accepted', 'priority': 'high',
+        })
+        self.assertEqual(Booking.objects.get().priority, 'high')
+
+    def test_unknown_priority_falls_back_to_medium(self):
+        self.client.force_login(self.member)
+        self.client.post(reverse('book_conference', args=[self.conference.pk]), {'priority': 'urgent!!'})
+        self.assertEqual(Booking.objects.get().priority, 'medium')
+
+    def test_manager_adjusts_a_team_members_priority(self):
+        booking = Booking.objects.create(user=self.member, conference=self.conference)
+        self.client.force_login(self.manager)
+        page = self.client.get(reverse('manage_bookings'))
+        self.assertContains(page, reverse('set_booking_priority', args=[booking.pk]))
+        response = self.client.post(reverse('set_booking_priority', args=[booking.pk]), {'priority': 'critical'})
+        self.assertRedirects(response, reverse('manage_bookings') + '?status=pending', fetch_redirect_response=False)
+        booking.refresh_from_db()
+        self.assertEqual(booking.priority, 'critical')
+
+    def test_manager_cannot_touch_other_teams_or_decided_bookings(self):
+        outsider = Booking.objects.create(user=make_user('outsider'), conference=self.conference)
+        decided = Booking.objects.create(
+            user=self.member, conference=make_conference(self.manager, title='Other'), status='approved',
+        )
+        self.client.force_login(self.manager)
+        for booking in (outsider, decided):
+            self.client.post(reverse('set_booking_priority', args=[booking.pk]), {'priority': 'critical'})
+            booking.refresh_from_db()
+            self.assertEqual(booking.priority, 'medium')
+
+
+# Profiling and instance limits
+
+class InstanceLimitTests(BookingsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin', is_superuser=True, is_staff=True)
+        locations = [Location.objects.create(name=f'Hall {n}') for n in range(3)]
+        Conference.objects.bulk_create([
+            Conference(title=f'Conference {n}', description='x', capacity=10,
+                       created_by=self.admin, location=locations[n % 3])
+            for n in range(90)
+        ])
+
+    def test_limit_raises_at_the_offending_line(self):
+        with self.assertRaises(InstanceLimitExceeded):
+            with instance_limit(10):
+                list(Conference.objects.all())
+
+    def test_limit_does_not_track_queries(self):
+        with instance_limit(100) as profile:
+            list(Conference.objects.all())
+        self.assertEqual(profile.instance_count, 90)
+        self.assertEqual(profile.query_count, 0)
+
+    def test_profile_counts_queries_per_call_site(self):
+        with Profile(trace_memory=False) as profile:
+            list(Conference.objects.all())
+            Location.objects.count()
+        self.assertEqual(profile.query_count, 2)
+        self.assertTrue(all('tests.py' in site for site in profile.query_sites))
+
+    def test_home_page_listing_is_bounded(self):
+        # 12 conferences per location, not all 90
+        with instance_limit(50):
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_manage_bookings_builds_one_page(self):
+        users = [make_user(f'user{n}') for n in range(3)]
+        Booking.objects.bulk_create([
+            Booking(user=users[n % 3], conference=conference)
+            for n, conference in enumerate(Conference.objects.all()[:60])
+        ])
+        self.client.force_login(self.admin)
+        # One page of 15 bookings with their users and conferences, plus the viewer
+        with instance_limit(50):
+            response = self.client.get(reverse('manage_bookings'))
+        self.assertEqual(response.status_code, 200)
+
+
+# Archiving old bookings
+
+class ArchiveTests(BookingsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.attendees = [make_user(f'user{n}') for n in range(3)]
+        long_ago = timezone.now() - timedelta(days=800)
+        self.finished = make_conference(
+            self.user, title='Old', capacity=3, starts_at=long_ago, ends_at=long_ago + timedelta(hours=8),
+        )
+        self.undated = make_conference(self.user, title='Undated', capacity=3)
+        # Created long ago, but with no dates it may still be running
+        Conference.objects.filter(pk=self.undated.pk).update(created_at=long_ago)
+        for conference in (self.finished, self.undated):
+            for status, user in zip(['approved', 'pending', 'cancelled'], self.attendees):
+                Booking.objects.create(user=user, conference=conference, status=status)
+
+    def archive_all(self):
+        for pk in archivable_conferences(archive_cutoff()).values_list('pk', flat=True):
+            archive_conference(pk, batch_size=2)
+
+    def test_only_finished_conferences_are_archived(self):
+        self.assertEqual(list(archivable_conferences(archive_cutoff())), [self.finished])
+        self.archive_all()
+        self.assertFalse(Booking.objects.filter(conference=self.finished).exists())
+        self.assertEqual(Booking.objects.filter(conference=self.undated).count(), 3)
+        self.assertEqual(ArchivedBooking.objects.filter(conference_id=self.finished.pk).count(), 3)
+
+    def test_rollup_keeps_the_counts(self):
+        self.archive_all()
+        rollup = BookingRollup.objects.get(conference_id=self.finished.pk)
+        self.assertEqual((rollup.total, rollup.approved, rollup.pending, rollup.cancelled), (3, 1, 1, 1))
+        self.assertEqual(rollup.conference_title, 'Old')
+
+    def test_rerun_is_harmless(self):
+        self.archive_all()
+        self.assertEqual(archive_conference(self.finished.pk), 0)
+        self.assertEqual(ArchivedBooking.objects.count(), 3)
+
+    def test_archiving_never_frees_seats_of_a_live_conference(self):
+        seats = self.undated.available_seats()
+        self.archive_all()
+        self.assertEqual(self.undated.available_seats(), seats)
+
+        self.client.force_login(self.attendees[0])
+        self.client.post(reverse('book_conference', args=[self.undated.pk]))
+        self.assertEqual(Booking.objects.filter(conference=self.undated, user=self.attendees[0]).count(), 1)
+
+    def test_archived_conference_cannot_be_booked_again(self):
+        self.archive_all()
+        self.client.force_login(self.attendees[0])
+        response = self.client.post(reverse('book_conference', args=[self.finished.pk]))
+        self.assertRedirects(
+            response, reverse('conference_detail', args=[self.finished.pk]), fetch_redirect_response=False,
+        )
+        self.assertFalse(Booking.objects.filter(conference=self.finished).exists())
+
+
+# Approval queue
+
+class ApprovalQueueTests(BookingsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manager = make_user('manager')
+        conference = make_conference(self.manager)
+        members = [make_user(f'member{n}') for n in range(4)]
+        for member in members:
+            TeamMembership.objects.create(manager=self.manager, member=member)
+        outsider = make_user('outsider')
+
+        bookings = [
+            Booking.objects.create(user=members[n % 4], conference=make_conference(self.manager, title=f'C{n}'))
+            for n in range(20)
+        ]
+        Booking.objects.create(user=outsider, conference=conference)
+        Booking.objects.create(user=members[0], conference=conference, status='approved')
+        # Half the queue shares one timestamp, so the id breaks ties
+        base = timezone.now() - timedelta(days=1)
+        for n, booking in enumerate(bookings):
+            Booking.objects.filter(pk=booking.pk).update(booking_date=base + timedelta(minutes=max(n, 10)))
+        self.expected = [booking.pk for booking in bookings]
+        self.client.force_login(self.manager)
+
+    def fetch_all(self, **params):
+        seen, after = [], None
+        while True:
+            query = dict(params, limit=6)
+            if after:
+                query['after'] = after
+            with self.assertNumQueries(4):
+                data = self.client.get(reverse('api_approval_queue'), query).json()
+            seen.extend(row['id'] for row in data['results'])
+            after = data['next']
+            if after is None:
+                return seen
+
+    def test_pages_cover_the_team_queue_once_oldest_first(self):
+        self.assertEqual(self.fetch_all(), self.expected)
+
+    def test_newest_first(self):
+        self.assertEqual(self.fetch_all(sort='newest'), list(reversed(self.expected)))
+
+    def test_queue_page_runs_a_constant_number_of_queries(self):
+        with self.assertNumQueries(4):
+            first = self.client.get(reverse('approval_queue'))
+        cursor = first.context['next_cursor']
+        with self.assertNumQueries(4):
+            second = self.client.get(reverse('approval_queue'), {'after': cursor})
+        pages = list(first.context['bookings']) + list(second.context['bookings'])
+        self.assertEqual([booking.pk for booking in pages], self.expected)
+
+    def test_malformed_cursor_starts_from_the_top(self):
+        data = self.client.get(reverse('api_approval_queue'), {'after': 'garbage', 'limit': 3}).json()
+        self.assertEqual([row['id'] for row in data['results']], self.expected[:3])
+
+    def test_non_managers_are_turned_away(self):
+        self.client.force_login(make_user('nobody'))
+        self.assertEqual(self.client.get(reverse('approval_queue')).status_code, 302)
+
+
+# Admin
+
+class BookingAdminTests(BookingsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin', is_superuser=True, is_staff=True)
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:bookings_booking_changelist')
+
+    def add_bookings(self, count):
+        start = User.objects.count()
+        users = [make_user(f'user{n}') for n in range(start, start + count)]
+        conference = make_conference(self.admin, capacity=100)
+        return [Booking.objects.create(user=user, conference=conference) for user in users]
+
+    def test_changelist_query_count_does_not_grow_with_rows(self):
+        for count in (2, 8):
+            self.add_bookings(count)
+            with self.assertNumQueries(6):
+                response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_bulk_action_is_two_updates(self):
+        bookings = self.add_bookings(5)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url, {
+                'action': 'approve_selected',
+                '_selected_action': [booking.pk for booking in bookings],
+            })
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(Booking.objects.filter(status='approved', approved_by=self.admin).count(), 5)
+
+    def test_filtered_bulk_action_still_touches_the_conferences(self):
+        bookings = self.add_bookings(3)
+        conference = bookings[0].conference
+        Conference.objects.filter(pk=conference.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        stale = Conference.objects.get(pk=conference.pk).updated_at
+
+        self.client.post(self.url + '?status__exact=pending', {
+            'action': 'approve_selected',
+            '_selected_action': [booking.pk for booking in bookings],
+        })
+        self.assertEqual(Booking.objects.filter(status='approved').count(), 3)
+        self.assertGreater(Conference.objects.get(pk=conference.pk).updated_at, stale)
+
+
+# Read API
+
+class ReadApiTests(BookingsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.hq = Location.objects.create(name='HQ')
+        self.conferences = [
+            make_conference(self.user, title=f'Conf {n}', capacity=5, location=self.hq if n % 2 else None)
+            for n in range(7)
+        ]
+        Booking.objects.create(user=self.user, conference=self.conferences[1], status='approved')
+
+    def get(self, name, **params):
+        return self.client.get(reverse(name), params)
+
+    def test_default_fields(self):
+        row = self.get('api_conferences').json()['results'][1]
+        self.assertEqual(set(row), {'id', 'title', 'location', 'starts_at', 'ends_at', 'seats_left'})
+        self.assertEqual((row['location'], row['seats_left']), ('HQ', 4))
+
+    def test_sparse_fieldset(self):
+        data = self.get('api_conferences', fields='title, capacity,title').json()
+        self.assertEqual(data['results'][0], {'title': 'Conf 0', 'capacity': 5})
+
+    def test_datetimes_encode_the_same_without_orjson(self):
+        data = {'at': datetime(2024, 5, 1, 9, 30, 15, 123456, tzinfo=dt_timezone.utc),
+                'on': datetime(2024, 5, 1, 9, 30, tzinfo=dt_timezone(timedelta(hours=-5)))}
+        expected = b'{"at":"2024-05-01T09:30:15.123456Z","on":"2024-05-01T09:30:00-05:00"}'
+        with mock.patch('bookings.api.orjson', None):
+            self.assertEqual(api.dumps(data), expected)
+        if api.orjson is not None:
+            self.assertEqual(api.dumps(data), expected)
+
+    def test_unknown_field_is_a_400(self):
+        response = self.get('api_conferences', fields='title,price')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('price', response.json()['error'])
+
+    def test_cursor_walks_every_row_once(self):
+        seen, params = [], {'fields': 'id', 'limit': 3}
+        while True:
+            data = self.get('api_conferences', **params).json()
+            seen.extend(row['id'] for row in data['results'])
+            if data['next'] is None:
+                break
+            params['after'] = data['next']
+        self.assertEqual(seen, [conference.pk for conference in self.conferences])
+
+    def test_bad_parameters_are_400s(self):
+        for params in ({'after': 'abc'}, {'limit': 'ten'}, {'location': 'HQ'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.get('api_conferences', **params).status_code, 400)
+
+    def test_limit_is_clamped(self):
+        data = self.get('api_conferences', fields='id', limit=0).json()
+        self.assertEqual(len(data['results']), 1)
+
+    def test_location_filter(self):
+        data = self.get('api_conferences', fields='title', location=self.hq.pk).json()
+        self.assertEqual([row['title'] for row in data['results']], ['Conf 1', 'Conf 3', 'Conf 5'])
+
+    def test_locations(self):
+        self.assertEqual(self.get('api_locations').json(), {'results': [{'id': self.hq.pk, 'name': 'HQ'}], 'next': None})
+
+    def test_my_bookings_are_newest_first_and_private(self):
+        Booking.objects.create(user=self.user, conference=self.conferences[2])
+        Booking.objects.create(user=make_user('bob'), conference=self.conferences[3])
+        self.client.force_login(self.user)
+        data = self.get('api_my_bookings', fields='conference,status').json()
+        self.assertEqual(data['results'], [
+            {'conference': 'Conf 2', 'status': 'pending'},
+            {'conference': 'Conf 1', 'status': 'approved'},
+        ])
+        data = self.get('api_my_bookings', fields='conference', status='approved').json()
+        self.assertEqual(data['results'], [{'conference': 'Conf 1'}])
+
+    def test_no_model_instances_are_built(self):
+        with instance_limit(0):
+            response = self.get('api_conferences', fields='id,title,location,seats_left')
+        self.assertEqual(response.status_code, 200)
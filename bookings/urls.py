@@ -22,15 +22,30 @@ urlpatterns = [
     # Manager/Admin URLs
     path('manage-bookings/', views.manage_bookings, name='manage_bookings'),
     path('approve-booking/<int:pk>/', views.approve_booking, name='approve_booking'),
+    path('booking/<int:pk>/priority/', views.set_booking_priority, name='set_booking_priority'),
+    path('approval-queue/', views.approval_queue_page, name='approval_queue'),
     
     # Reports and exports
     path('reports/', views.reports, name='reports'),
     path('export-bookings/', views.export_bookings, name='export_bookings'),
     
+    # Background jobs
+    path('jobs/<int:pk>/', views.job_status, name='job_status'),
+    path('jobs/<int:pk>/download/', views.job_download, name='job_download'),
+    
+    # Calendar feeds
+    path('calendar/user/<str:token>.ics', views.user_calendar_feed, name='user_calendar_feed'),
+    path('calendar/location/<int:pk>.ics', views.location_calendar_feed, name='location_calendar_feed'),
+    
     # Authentication
     path('register/', views.register, name='register'),
     path('logout/', views.custom_logout, name='logout'),  # Custom logout view
     
     # API endpoints (optional)
     path('api/conference/<int:pk>/availability/', views.api_conference_availability, name='api_conference_availability'),
+    path('api/approval-queue/', views.api_approval_queue, name='api_approval_queue'),
+    path('api/jobs/<int:pk>/', views.api_job_status, name='api_job_status'),
+    path('api/conferences/', views.api_conferences, name='api_conferences'),
+    path('api/locations/', views.api_locations, name='api_locations'),
+    path('api/my-bookings/', views.api_my_bookings, name='api_my_bookings'),
 ]
\ No newline at end of file
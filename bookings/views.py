@@ -4,23 +4,43 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django import forms
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.contrib.auth import login
+from django.contrib.auth import login, logout
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib import messages
 from django.db import IntegrityError
-from django.http import HttpResponse, JsonResponse
+from django.http import JsonResponse, FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.core.cache import cache
+from django.urls import reverse
+from django.views.decorators.http import require_POST, condition
 from django.core.paginator import Paginator
 from django.db.models import Q, Sum, Count
 from django.utils import timezone
-from django.template.loader import render_to_string
-from django.core.mail import send_mail
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.conf import settings
-import csv
-from datetime import datetime, timedelta
-from django.contrib.auth import logout
-from django.shortcuts import redirect
-from django.contrib import messages
-from .models import Conference, Booking, ConferenceCategory, Location
+from django.core.files.storage import default_storage
+from datetime import timedelta
+from collections import Counter
+import os
+# django.core.mail is imported inside the view that uses it to keep worker
+# boot fast
+from .models import Conference, Booking, ConferenceCategory, Location, Job, ArchivedBooking
+from .caching import (
+    conditional_page, home_etag, home_last_modified,
+    conference_etag, conference_last_modified, conference_max_age, availability_etag,
+    get_conference_listing, group_by_location, get_available_seats, LOCATION_LISTING_LIMIT,
+)
+from .ratelimit import rate_limit, admission_control
+from .jobs import enqueue
+from .conflicts import user_conflict
+from . import analytics, api
+from .archive import archived_totals
+from .ical import (
+    stream_calendar, user_feed_token, user_id_from_token, user_events, location_events,
+    user_feed_version, location_feed_version,
+)
+from .approvals import (
+    is_team_manager, manages, team_bookings, approval_queue, encode_cursor,
+)
 
 
 def is_admin(user):
@@ -57,7 +77,16 @@ def is_admin(user):
 class ConferenceForm(forms.ModelForm):
     class Meta:
         model = Conference
-        fields = ['title', 'description', 'location' , 'capacity', 'requires_approval', 'image']
+        fields = [
+            'title', 'description', 'location' , 'capacity', 'starts_at', 'ends_at', 'requires_approval',
+            'allocation_mode', 'applications_close_at', 'lottery_weighting', 'image',
+        ]
+        widgets = {
+            'starts_at': forms.DateTimeInput(attrs={'type': 'datetime-local'}, format='%Y-%m-%dT%H:%M'),
+            'ends_at': forms.DateTimeInput(attrs={'type': 'datetime-local'}, format='%Y-%m-%dT%H:%M'),
+            'applications_close_at': forms.DateTimeInput(attrs={'type': 'datetime-local'}, format='%Y-%m-%dT%H:%M'),
+        }
+
 
 # Add Conference    
 @login_required
@@ -97,18 +126,28 @@ def edit_conference(request, pk):
 def delete_conference(request, pk):
     conference = get_object_or_404(Conference, pk=pk)
     if request.method == 'POST':
-        conference.delete()
-        messages.success(request, 'Conference deleted successfully.')
-        return redirect('home')
+        # Deleting cascades through every booking, so it runs in the job worker.
+        # Until then the conference is hidden and closed to bookings.
+        now = timezone.now()
+        first_request = Conference.objects.filter(pk=pk, deletion_requested_at__isnull=True).update(
+            deletion_requested_at=now, updated_at=now,
+        )
+        # A repeated request gets the job already queued (unless that one failed)
+        job = enqueue(
+            'delete_conference', {'conference_id': conference.pk}, user=request.user, unique=not first_request,
+        )
+        messages.success(request, f'Deletion of {conference.title} has been queued.')
+        return redirect('job_status', pk=job.pk)
     return render(request, 'bookings/conference_confirm_delete.html', {'conference': conference})
 
+@conditional_page(etag_func=home_etag, last_modified_func=home_last_modified)
 def home(request):
     """Home page view with conference listings"""
     # Get all categories for filtering
     categories = ConferenceCategory.objects.all()
     
     # Get upcoming conferences
-    conferences = Conference.objects.order_by('created_at')
+    conferences = Conference.objects.filter(deletion_requested_at__isnull=True).order_by('created_at')
 
     # Search functionality
     search_query = request.GET.get('search')
@@ -124,17 +163,24 @@ def home(request):
     if category_filter:
         conferences = conferences.filter(category_id=category_filter)
 
-    # Group conferences by location
+    # Group conferences by location, a bounded number per location
     locations = Location.objects.all()
-    conferences_by_location = {}
-    for location in locations:
-        conferences_by_location[location] = conferences.filter(location=location)
+    location_filter = request.GET.get('location')
+    if location_filter and location_filter.isdigit():
+        conferences_by_location = group_by_location(
+            locations.filter(pk=location_filter), conferences, per_location=LOCATION_LISTING_LIMIT,
+        )
+    elif search_query or category_filter:
+        conferences_by_location = group_by_location(locations, conferences)
+    else:
+        conferences_by_location = get_conference_listing(request)
 
     context = {
         'conferences_by_location': conferences_by_location,
         'categories': categories,
         'search_query': search_query,
         'category_filter': category_filter,
+        'location_filter': location_filter,
         'locations': locations,
     }
     return render(request, 'bookings/home.html', context)
@@ -146,28 +192,31 @@ def dashboard(request):
     user_bookings = Booking.objects.filter(user=request.user).order_by('-booking_date')[:5]
     
     # Get upcoming conferences
-    upcoming_conferences = Conference.objects.order_by('created_at')[:5]
+    upcoming_conferences = Conference.objects.filter(deletion_requested_at__isnull=True).order_by('created_at')[:5]
 
     # Calculate statistics
     total_conferences = Conference.objects.count()
-    booked_conferences = Booking.objects.filter(user=request.user).count()
     available_conferences = Conference.objects.filter(created_at__gte=timezone.now().date()).count()
+    # Per-status counts over live and archived bookings, one grouped query each
+    status_counts = Counter()
+    for model in (Booking, ArchivedBooking):
+        status_counts.update(dict(
+            model.objects.filter(user=request.user).values_list('status').annotate(total=Count('id')).order_by()
+        ))
+    booked_conferences = sum(status_counts.values())
     stats = {
         'total_conferences': total_conferences,
         'booked_conferences': booked_conferences,
         'available_conferences': available_conferences,
         'total_bookings': booked_conferences,
-        'approved_bookings': Booking.objects.filter(user=request.user, status='approved').count(),
-        'pending_bookings': Booking.objects.filter(user=request.user, status='pending').count(),
-        'rejected_bookings': Booking.objects.filter(user=request.user, status='rejected').count(),
+        'approved_bookings': status_counts['approved'],
+        'pending_bookings': status_counts['pending'],
+        'rejected_bookings': status_counts['rejected'],
     }
     
     # Manager-specific data
-    if hasattr(request.user, 'is_manager') and request.user.is_manager():
-        pending_approvals = Booking.objects.filter(
-            user__department=request.user.department,
-            status='pending'
-        ).count()
+    if is_team_manager(request.user):
+        pending_approvals = team_bookings(request.user).filter(status='pending').count()
         stats['pending_approvals'] = pending_approvals
     
     context = {
@@ -177,6 +226,9 @@ def dashboard(request):
     }
     return render(request, 'bookings/dashboard.html', context)
 
+@conditional_page(
+    etag_func=conference_etag, last_modified_func=conference_last_modified, max_age_func=conference_max_age,
+)
 def conference_detail(request, pk):
     """Conference detail view"""
     conference = get_object_or_404(Conference, pk=pk)
@@ -191,38 +243,79 @@ def conference_detail(request, pk):
     context = {
         'conference': conference,
         'user_booking': user_booking,
-        'available_seats': conference.available_seats() if hasattr(conference, 'available_seats') else conference.capacity
+        'available_seats': get_available_seats(conference)
     }
     return render(request, 'bookings/conference_detail.html', context)
 
 @login_required
+@rate_limit('book')
+@admission_control()
 def book_conference(request, pk):
     """Book a conference"""
     conference = get_object_or_404(Conference, pk=pk)
     
-    # Check if conference is fully booked
-    available_seats = getattr(conference, 'available_seats', lambda: conference.capacity)()
-    if available_seats <= 0:
-        messages.error(request, 'Sorry, this conference is fully booked.')
+    if conference.deletion_requested_at is not None:
+        messages.error(request, 'Sorry, this conference is being deleted.')
+        return redirect('home')
+    
+    # Bookings of finished conferences get archived, so they can't be counted on here
+    if conference.has_ended():
+        messages.error(request, 'Sorry, this conference has already ended.')
         return redirect('conference_detail', pk=pk)
     
+    is_lottery = conference.allocation_mode == 'lottery'
+    if is_lottery:
+        # Lottery seats are drawn once applications close, so there's no seat check here
+        if not conference.applications_open():
+            messages.error(request, 'Sorry, applications for this conference are closed.')
+            return redirect('conference_detail', pk=pk)
+    else:
+        # Check if conference is fully booked
+        available_seats = getattr(conference, 'available_seats', lambda: conference.capacity)()
+        if available_seats <= 0:
+            messages.error(request, 'Sorry, this conference is fully booked.')
+            return redirect('conference_detail', pk=pk)
+    
     # Check if user already booked this conference
     existing_booking = Booking.objects.filter(user=request.user, conference=conference).first()
     if existing_booking:
         messages.error(request, 'You have already booked this conference.')
         return redirect('conference_detail', pk=pk)
     
+    # Check the user isn't already attending something at the same time
+    clash = user_conflict(request.user, conference)
+    if clash:
+        messages.error(request, f'This conference overlaps with {clash.conference.title}, which you have already booked.')
+        return redirect('conference_detail', pk=pk)
+    
     if request.method == 'POST':
         justification = request.POST.get('justification', '')
+        # Weights the draw for lottery conferences using priority weighting
+        priority = request.POST.get('priority', 'medium')
+        if priority not in dict(Conference.PRIORITY_CHOICES):
+            priority = 'medium'
         
         try:
+            if is_lottery:
+                status = 'applied'
+            else:
+                status = 'pending' if getattr(conference, 'requires_approval', True) else 'approved'
             booking = Booking.objects.create(
                 user=request.user,
                 conference=conference,
                 justification=justification,
-                status='pending' if getattr(conference, 'requires_approval', True) else 'approved'
+                priority=priority,
+                status=status
             )
             
+            if is_lottery:
+                close = timezone.localtime(conference.applications_close_at)
+                messages.success(
+                    request,
+                    f'Your application for {conference.title} is in! Seats are drawn by lottery after {close:%b %d, %Y %H:%M}.'
+                )
+                return redirect('my_bookings')
+            
             status_message = 'pending approval' if booking.status == 'pending' else 'confirmed'
             messages.success(
                 request, 
@@ -230,7 +323,7 @@ def book_conference(request, pk):
             )
             
             # Send notification email if needed
-            if booking.status == 'pending' and hasattr(request.user, 'department') and request.user.department:
+            if booking.status == 'pending' and request.user.team_memberships.exists():
                 # You can add email notification logic here
                 pass
             
@@ -240,7 +333,8 @@ def book_conference(request, pk):
             messages.error(request, 'You have already booked this conference.')
     
     return render(request, 'bookings/book_conference.html', {
-        'conference': conference
+        'conference': conference,
+        'priority_choices': Conference.PRIORITY_CHOICES,
     })
 
 @login_required
@@ -259,10 +353,13 @@ def my_bookings(request):
     """User's booking list"""
     # Show all bookings to admin, only user's bookings otherwise
     is_admin_user = is_admin(request.user)
+    # Bookings for long-past conferences live in the archive table
+    show_archived = request.GET.get('archived') == '1'
+    source = ArchivedBooking if show_archived else Booking
     if is_admin_user:
-        bookings = Booking.objects.order_by('-booking_date').all()
+        bookings = source.objects.order_by('-booking_date').all()
     else:
-        bookings = Booking.objects.filter(user=request.user).order_by('-booking_date')
+        bookings = source.objects.filter(user=request.user).order_by('-booking_date')
     # Filter by status
     status_filter = request.GET.get('status')
     if status_filter and status_filter != 'all':
@@ -275,34 +372,33 @@ def my_bookings(request):
         'bookings': bookings,
         'status_filter': status_filter,
         'is_admin_user': is_admin_user,
+        'show_archived': show_archived,
+        'calendar_feed_url': request.build_absolute_uri(
+            reverse('user_calendar_feed', args=[user_feed_token(request.user)])
+        ),
     })
 
 # Manager/Admin views
+def can_see_all_bookings(user):
+    """Staff and admins act on every booking, managers only on their team's"""
+    return (hasattr(user, 'is_admin') and user.is_admin()) or user.is_staff or user.is_superuser
+
 def is_manager_or_admin(user):
     """Check if user is manager or admin"""
-    return (hasattr(user, 'is_manager') and user.is_manager()) or \
-           (hasattr(user, 'is_admin') and user.is_admin()) or \
-           user.is_staff or user.is_superuser
+    return can_see_all_bookings(user) or is_team_manager(user)
 
 @login_required
 @user_passes_test(is_manager_or_admin)
 def manage_bookings(request):
     """Manager view to manage team bookings"""
     # Get bookings based on user role
-    if hasattr(request.user, 'is_admin') and request.user.is_admin():
-        bookings = Booking.objects.all()
-        print("Admin user - accessing all bookings", bookings)
-    elif hasattr(request.user, 'department') and request.user.department:
-        bookings = Booking.objects.filter(user__department=request.user.department)
-    else:
-        bookings = Booking.objects.none()
-    print("Admin user - accessing all bookings", bookings)
+    bookings = team_bookings(request.user, see_all=can_see_all_bookings(request.user))
     # Filter by status
     status_filter = request.GET.get('status', 'pending')
     if status_filter and status_filter != 'all':
         bookings = bookings.filter(status=status_filter)
     
-    bookings = bookings.order_by('-booking_date')
+    bookings = bookings.select_related('user', 'conference').order_by('-booking_date')
     
     # Pagination
     paginator = Paginator(bookings, 15)
@@ -312,25 +408,69 @@ def manage_bookings(request):
     return render(request, 'bookings/manage_bookings.html', {
         'bookings': bookings,
         'status_filter': status_filter,
+        'priority_choices': Conference.PRIORITY_CHOICES,
     })
 
 @login_required
-@user_passes_test(is_admin)
+@user_passes_test(is_manager_or_admin)
+def approval_queue_page(request):
+    """Keyboard-driven triage of the team's pending bookings, oldest first"""
+    newest_first = request.GET.get('sort') == 'newest'
+    bookings, next_cursor = approval_queue(
+        request.user,
+        see_all=can_see_all_bookings(request.user),
+        newest_first=newest_first,
+        after=request.GET.get('after'),
+    )
+    return render(request, 'bookings/approval_queue.html', {
+        'bookings': bookings,
+        'next_cursor': next_cursor,
+        'sort': 'newest' if newest_first else 'oldest',
+    })
+
+@login_required
+@user_passes_test(is_manager_or_admin)
+def api_approval_queue(request):
+    """Next N pending bookings after a cursor, for the triage page"""
+    try:
+        limit = int(request.GET.get('limit', 15))
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+
+    bookings, next_cursor = approval_queue(
+        request.user,
+        see_all=can_see_all_bookings(request.user),
+        newest_first=request.GET.get('sort') == 'newest',
+        after=request.GET.get('after'),
+        limit=limit,
+    )
+    return JsonResponse({
+        'results': [
+            {
+                'id': booking.pk,
+                'cursor': encode_cursor(booking),
+                'user': booking.user.get_full_name() or booking.user.username,
+                'email': booking.user.email,
+                'conference': booking.conference.title,
+                'location': booking.conference.location.name if booking.conference.location else '',
+                'booking_date': booking.booking_date.isoformat(),
+                'justification': booking.justification,
+            }
+            for booking in bookings
+        ],
+        'next': next_cursor,
+    })
+
+@login_required
+@user_passes_test(is_manager_or_admin)
 def approve_booking(request, pk):
     """Approve or reject a booking"""
+    from django.core.mail import send_mail
+
     booking = get_object_or_404(Booking, pk=pk)
     
     # Check permissions
-    can_approve = False
-    if (
-        (hasattr(request.user, 'is_admin') and request.user.is_admin()) or
-        request.user.is_staff or request.user.is_superuser
-    ):
-        can_approve = True
-    elif (hasattr(request.user, 'is_manager') and request.user.is_manager() and 
-          hasattr(request.user, 'department') and hasattr(booking.user, 'department') and
-          booking.user.department == request.user.department):
-        can_approve = True
+    can_approve = can_see_all_bookings(request.user) or manages(request.user, booking.user)
     
     if not can_approve:
         messages.error(request, 'You do not have permission to approve this booking.')
@@ -380,17 +520,46 @@ def approve_booking(request, pk):
             except Exception as e:
                 print(f"Failed to send email: {e}")
     
+    # The triage page posts back here and wants to continue where it was
+    next_url = request.POST.get('next')
+    if next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
     return redirect('manage_bookings')
 
+@login_required
+@user_passes_test(is_manager_or_admin)
+@require_POST
+def set_booking_priority(request, pk):
+    """Change the priority of a booking that hasn't been decided yet"""
+    booking = get_object_or_404(Booking, pk=pk)
+    if not (can_see_all_bookings(request.user) or manages(request.user, booking.user)):
+        messages.error(request, 'You do not have permission to change this booking.')
+    elif booking.status not in ('applied', 'pending'):
+        messages.error(request, 'Only open applications and pending bookings can be reprioritised.')
+    elif request.POST.get('priority') not in dict(Conference.PRIORITY_CHOICES):
+        messages.error(request, 'Unknown priority.')
+    else:
+        booking.priority = request.POST['priority']
+        booking.save(update_fields=['priority'])
+        messages.success(request, f'Priority for {booking.user.username} set to {booking.get_priority_display()}.')
+    return redirect(f"{reverse('manage_bookings')}?status={booking.status}")
+
 @login_required
 @user_passes_test(lambda u: u.is_staff or u.is_superuser)
 def reports(request):
     """Generate reports (admin only)"""
-    # Basic statistics
-    total_bookings = Booking.objects.count()
-    approved_bookings = Booking.objects.filter(status='approved').count()
-    pending_bookings = Booking.objects.filter(status='pending').count()
-    rejected_bookings = Booking.objects.filter(status='rejected').count()
+    # Basic statistics: live bookings in one aggregate, plus the archive rollups
+    live = Booking.objects.aggregate(
+        total=Count('id'),
+        approved=Count('id', filter=Q(status='approved')),
+        pending=Count('id', filter=Q(status='pending')),
+        rejected=Count('id', filter=Q(status='rejected')),
+    )
+    archived = archived_totals()
+    total_bookings = live['total'] + archived['total']
+    approved_bookings = live['approved'] + archived['approved']
+    pending_bookings = live['pending'] + archived['pending']
+    rejected_bookings = live['rejected'] + archived['rejected']
     
     # Monthly booking trends (last 12 months)
     from django.db.models.functions import TruncMonth
@@ -418,44 +587,120 @@ def reports(request):
     except Exception as e:
         print(f"Department stats error: {e}")
     
+    # Capacity recommendations are a full-history pass, so they come from the
+    # latest background rebuild; a new one is queued once that goes stale.
+    # Forecasting needs the optional NumPy, without it the section is hidden.
+    forecasting_available = analytics.np is not None
+    forecast_job = Job.objects.filter(
+        kind='rebuild_capacity_forecast', status='succeeded'
+    ).order_by('-finished_at').first() if forecasting_available else None
+    max_age = timedelta(seconds=getattr(settings, 'BOOKINGS_FORECAST_MAX_AGE', 60 * 60))
+    if forecasting_available and (forecast_job is None or forecast_job.finished_at < timezone.now() - max_age):
+        already_queued = Job.objects.filter(
+            kind='rebuild_capacity_forecast', status__in=['queued', 'running']
+        ).exists()
+        if not already_queued:
+            enqueue('rebuild_capacity_forecast', user=request.user)
+    capacity_forecast = forecast_job.result['forecasts'] if forecast_job else []
+    
     context = {
         'total_bookings': total_bookings,
         'approved_bookings': approved_bookings,
         'pending_bookings': pending_bookings,
         'rejected_bookings': rejected_bookings,
+        'archived_bookings': archived['total'],
         'dept_stats': dept_stats,
         'monthly_bookings': monthly_bookings,
+        'forecasting_available': forecasting_available,
+        'capacity_forecast': capacity_forecast,
+        'forecast_generated_at': forecast_job.finished_at if forecast_job else None,
     }
     return render(request, 'bookings/reports.html', context)
 
 @login_required
 @user_passes_test(lambda u: u.is_staff or u.is_superuser)
+@require_POST
 def export_bookings(request):
-    """Export bookings to CSV"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="bookings_export.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow([
-        'User', 'Email', 'Department', 'Conference', 'Conference Date', 
-        'Booking Status', 'Booking Date', 'Cost', 'Approved By'
-    ])
-    
-    bookings = Booking.objects.select_related('user', 'conference', 'approved_by').all()
-    
-    for booking in bookings:
-        writer.writerow([
-            booking.user.get_full_name() if hasattr(booking.user, 'get_full_name') else booking.user.username,
-            booking.user.email,
-            getattr(booking.user, 'department', 'N/A'),
-            booking.conference.title,
-            # booking.conference.date,
-            booking.get_status_display(),
-            booking.booking_date.strftime('%Y-%m-%d %H:%M'),
-            booking.conference.price,
-            booking.approved_by.get_full_name() if booking.approved_by else '',
-        ])
-    
+    """Queue a CSV export of all bookings"""
+    job = enqueue('export_bookings', user=request.user)
+    return redirect('job_status', pk=job.pk)
+
+# Background jobs
+@login_required
+@user_passes_test(lambda u: u.is_staff or u.is_superuser)
+def job_status(request, pk):
+    """Progress page for a background job; polls api_job_status"""
+    job = get_object_or_404(Job, pk=pk)
+    return render(request, 'bookings/job_status.html', {'job': job})
+
+@login_required
+@user_passes_test(lambda u: u.is_staff or u.is_superuser)
+def api_job_status(request, pk):
+    """Current state of a background job"""
+    job = get_object_or_404(Job, pk=pk)
+    return JsonResponse({
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'attempts': job.attempts,
+        'finished': job.is_finished,
+        'download_url': reverse('job_download', args=[job.pk]) if job.status == 'succeeded' and (job.result or {}).get('file') else None,
+    })
+
+@login_required
+@user_passes_test(lambda u: u.is_staff or u.is_superuser)
+def job_download(request, pk):
+    """Download the file produced by a finished job"""
+    job = get_object_or_404(Job, pk=pk, status='succeeded')
+    name = (job.result or {}).get('file')
+    if not name or not default_storage.exists(name):
+        raise Http404('This job has no file to download.')
+    return FileResponse(default_storage.open(name, 'rb'), as_attachment=True, filename=os.path.basename(name))
+
+# Calendar feeds
+CALENDAR_CONTENT_TYPE = 'text/calendar; charset=utf-8'
+CALENDAR_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _user_feed_version(request, token):
+    """Memoized on the request: it is both the ETag and the body cache key"""
+    if not hasattr(request, '_calendar_feed_version'):
+        user_id = user_id_from_token(token)
+        request._calendar_feed_version = user_feed_version(user_id) if user_id else None
+    return request._calendar_feed_version
+
+
+def _location_feed_etag(request, pk):
+    return location_feed_version(pk)
+
+
+@condition(etag_func=_user_feed_version)
+def user_calendar_feed(request, token):
+    """A user's approved bookings as iCalendar; the token in the URL stands in for a login"""
+    user_id = user_id_from_token(token)
+    if user_id is None:
+        raise Http404('Unknown calendar feed')
+    # The version changes with the user's bookings, so a cached body is
+    # only ever replaced, never invalidated
+    cache_key = f'ics:user:{user_id}:{_user_feed_version(request, token)}'
+    body = cache.get(cache_key)
+    if body is None:
+        body = ''.join(stream_calendar('My conferences', user_events(user_id), request.get_host()))
+        cache.set(cache_key, body, CALENDAR_CACHE_TIMEOUT)
+    return HttpResponse(body, content_type=CALENDAR_CONTENT_TYPE)
+
+
+@condition(etag_func=_location_feed_etag)
+def location_calendar_feed(request, pk):
+    """Every scheduled conference at a location, streamed event by event"""
+    location = get_object_or_404(Location, pk=pk)
+    response = StreamingHttpResponse(
+        stream_calendar(location.name, location_events(location.pk), request.get_host()),
+        content_type=CALENDAR_CONTENT_TYPE,
+    )
+    response['Content-Disposition'] = f'inline; filename="location-{location.pk}.ics"'
     return response
 
 # Authentication views
@@ -475,11 +720,13 @@ def register(request):
 
 # API views (optional)
 @login_required
+@rate_limit('availability', as_json=True)
+@conditional_page(etag_func=availability_etag, last_modified_func=conference_last_modified)
 def api_conference_availability(request, pk):
     """API endpoint to check conference availability"""
     try:
         conference = get_object_or_404(Conference, pk=pk)
-        available_seats = getattr(conference, 'available_seats', lambda: conference.capacity)()
+        available_seats = get_available_seats(conference)
         
         return JsonResponse({
             'available_seats': available_seats,
@@ -489,6 +736,44 @@ def api_conference_availability(request, pk):
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
     
+# Read API
+@rate_limit('api', as_json=True)
+def api_conferences(request):
+    """Conferences as compact JSON; ?fields=, ?location=, ?after= and ?limit="""
+    conferences = Conference.objects.filter(deletion_requested_at__isnull=True)
+    try:
+        if request.GET.get('location'):
+            conferences = conferences.filter(location_id=int(request.GET['location']))
+        return api.json_response(api.page(
+            request, conferences, api.CONFERENCE_FIELDS, api.CONFERENCE_DEFAULT_FIELDS,
+        ))
+    except ValueError as e:  # api.ApiError, or a non-numeric ?location=
+        return api.json_response({'error': str(e)}, status=400)
+
+@rate_limit('api', as_json=True)
+def api_locations(request):
+    """Locations as compact JSON"""
+    try:
+        return api.json_response(api.page(
+            request, Location.objects.all(), api.LOCATION_FIELDS, api.LOCATION_DEFAULT_FIELDS,
+        ))
+    except api.ApiError as e:
+        return api.json_response({'error': str(e)}, status=400)
+
+@login_required
+@rate_limit('api', as_json=True)
+def api_my_bookings(request):
+    """The signed-in user's bookings, newest first; ?status= filters"""
+    bookings = Booking.objects.filter(user=request.user)
+    if request.GET.get('status'):
+        bookings = bookings.filter(status=request.GET['status'])
+    try:
+        return api.json_response(api.page(
+            request, bookings, api.BOOKING_FIELDS, api.BOOKING_DEFAULT_FIELDS, descending=True,
+        ))
+    except api.ApiError as e:
+        return api.json_response({'error': str(e)}, status=400)
+    
 def custom_logout(request):
     """Custom logout view that handles both GET and POST requests"""
     logout(request)
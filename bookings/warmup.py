@@ -0,0 +1,51 @@
+# bookings/warmup.py
+"""Warm a worker process so the first requests after a deploy are not slow"""
+import logging
+from pathlib import Path
+
+from django.apps import apps
+from django.db import DatabaseError
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+from .caching import get_conference_listing, prime_availability
+
+logger = logging.getLogger(__name__)
+
+
+def compile_templates():
+    """Compile every template shipped with the app into the cached loader"""
+    # The cached template loader is the default whenever TEMPLATES doesn't set
+    # 'loaders', so each get_template() stores the compiled template for reuse
+    template_dir = Path(apps.get_app_config('bookings').path) / 'templates'
+    names = sorted(
+        path.relative_to(template_dir).as_posix()
+        for path in template_dir.rglob('*.html')
+    )
+    for name in names:
+        get_template(name)
+    return names
+
+
+def load_urlconf():
+    """Import the URLconf and build the resolver's reverse lookup tables"""
+    resolver = get_resolver()
+    # Accessing reverse_dict populates the resolver (and imports every view)
+    return len(resolver.reverse_dict)
+
+
+def prime_caches():
+    """Fill the listing and availability caches"""
+    get_conference_listing()
+    return prime_availability()
+
+
+def warm_process():
+    """Everything above; call once per worker after Django is set up"""
+    compile_templates()
+    load_urlconf()
+    try:
+        prime_caches()
+    except DatabaseError:
+        # An unmigrated or unreachable database must not stop the worker booting
+        logger.warning('Skipping cache warmup, database unavailable', exc_info=True)
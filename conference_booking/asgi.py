@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'conference_booking.settings')
 
 application = get_asgi_application()
+
+# Compile templates, build the URL resolver and prime caches before the
+# first request reaches this worker
+from bookings.warmup import warm_process  # noqa: E402
+
+warm_process()